@@ -71,7 +71,11 @@ the structure and meaning of a ``.w`` source file.
 
 @<Chunk class hierarchy -- used to describe individual chunks@>
 
+@<Cross-reference records -- the rows of the macro and userid tables@>
+
 @<Web class -- describes the overall "web" of chunks@>
+
+@<ReferenceGraph class -- the references among chunks@>
 @}
 
 The above order is reasonably helpful for Python and minimizes forward
@@ -145,11 +149,11 @@ and, consequently, chunk references.
 @d Imports
 @{from collections import defaultdict
 from collections.abc import Iterator
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from itertools import chain
 from functools import cache
 import logging
 from pathlib import Path
-from types import SimpleNamespace
 from typing import Any, Optional, Literal, ClassVar, Union
 from weakref import ref, ReferenceType
 @}
@@ -184,6 +188,16 @@ class Web:
     
     # The ``@@|`` defined names and chunks with which they're associated.
     userid_map: defaultdict[str, list["Chunk"]] = field(init=False)
+    
+    # The ``chunk_map`` names, sorted, to find the names that match an abbreviation.
+    name_index: list[str] = field(init=False, repr=False, default_factory=list)
+    
+    # Incremented when the web changes, to discard the names and chunks resolved earlier.
+    generation: int = field(init=False, repr=False, default=0)
+    
+    # The cross-reference tables, and the generation and number of chunks used to build them.
+    xref: dict[str, Any] = field(init=False, repr=False, default_factory=dict)
+    xref_key: tuple[int, int] = field(init=False, repr=False, default=(0, 0))
         
     logger: logging.Logger = field(init=False, default=logging.getLogger("Web"))
     
@@ -194,29 +208,39 @@ class Web:
 @}
 
 The  ``__post_init__()`` special method populates the detailed structure of the WEB document. 
-There are several passes through the WEB to digest the data:
+This is done in a single pass through the chunks and their commands, followed by
+the resolution of the names which were collected by that pass.
 
 1.  Set all ``Chunk`` and ``Command`` back references to the ``Web`` container.
     This is required so a ``Chunk`` with a ``ReferenceCommand`` instance can properly
     refer to a chunk elsewhere in the ``Web`` container. There are all weak
     references to faciliate garbgage collection.
 
-2.  Locate the unabbreviated names in chunks and references to chunks.
+    In the same pass, number the named chunks, accumulate the user-defined names
+    after a ``@@|`` command, and locate the unabbreviated names in chunks and references to chunks.
     Names can found in two places. The ``@@d`` command provides a name.
     A ``@@<name@@>`` command can also provide a reference to a name. 
     The unabbreviated names define the structure. Unambiguous abbreviations can be
     used freely, since full names are located first.
+    The ``@@d`` chunks and the ``ReferenceCommand`` instances in named chunks are
+    saved for the next steps.
 
-3.  Accumulate chunk lists, output lists, and name definition lists. This pass
-    does two things. First any user-defined name after a ``@@|`` command
-    is accumulated. Second, any abbreviated name is resolved to the full name, 
+2.  Resolve the names of the ``@@d`` chunks. 
+    Any abbreviated name is resolved to the full name, 
     and the complete mapping from chunk name to a sequence of defining chunks is completed.
 
-4.  Set the ``referencedBy`` attribute of a ``Chunk`` instance with all of the
+3.  Resolve each ``ReferenceCommand``, which saves the full name and the list of chunks.
+    Set the ``referencedBy`` attribute of a ``Chunk`` instance with all of the
     commands that point to it. The idea here is that a top-level ``Chunk`` instance
     may have references to other ``Chunk`` isntances. This forms a kind of tree.
     Any given low-level ``Chunk`` object is named by a sequence of parent ``Chunk`` objects.
 
+An abbreviation can appear before the full name it abbreviates, 
+so the names can't be resolved until all of the full names have been located. 
+The second and third steps only visit the chunks and commands saved by the first step.
+They save the resolved names, described below, so the resolution isn't repeated when weaving or tangling.
+No debugging messages are formatted in these loops; with a large web, this is a significant cost.
+
 Once the initialization is complete, the ``Web`` instance can be woven or tangled.
 
 @d Web class...
@@ -226,63 +250,65 @@ Once the initialization is complete, the ``Web`` instance can be woven or tangle
         Populate weak references throughout the web to make full_name properties work.
         Then. Locate all macro definitions and userid references. 
         """
-        # Pass 1 -- set all Chunk and Command back references.
-        for c in self.chunks:
-            c.web = ref(self)
-            for cmd in c.commands:
-                cmd.web = ref(self)
-                
-        # Named Chunks = Union of macro_iter and file_iter
-        named_chunks = list(filter(lambda c: c.name is not None, self.chunks))
-
-        # Pass 2 -- locate the unabbreviated names in chunks and references to chunks.
         self.chunk_map = {}
-        for seq, c in enumerate(named_chunks, start=1):
+        self.userid_map = defaultdict(list)
+        web = ref(self)
+        defined: list[Chunk] = []
+        references: list[tuple[Chunk, ReferenceCommand]] = []
+        seq = 0
+        
+        # Pass 1 -- set back references, sequence numbers, userids, and unabbreviated names.
+        for c in self.chunks:
+            c.web = web
+            if c.name is None:
+                # Anonymous text chunks.
+                for cmd in c.commands:
+                    cmd.web = web
+                continue
+            seq += 1
             c.seq = seq
-            if not c.path:
-                # Use ``@@d name`` chunks (reject ``@@o`` and text)
+            for name in c.def_names:
+                self.userid_map[name].append(c)
+            if c.path:
+                # Output ``@@o`` chunks.
+                # Assume all @@o chunks are unique. If they're not, they overwrite each other.
+                # Also, there's not ``full_name`` for these chunks.
+                c.initial = True
+            else:
+                # Named ``@@d name`` chunks
+                defined.append(c)
                 if c.name and not c.name.endswith('...'):
-                    self.logger.debug(f"__post_init__ 2a {c.name=!r}")
                     self.chunk_map.setdefault(c.name, [])
             for cmd in c.commands:
+                cmd.web = web
                 # Find ``@@< name @@>`` in ``@@d name`` chunks or ``@@o`` chunks 
                 if cmd.has_name:
-                    if not cast(ReferenceCommand, cmd).name.endswith('...'):
-                        self.logger.debug(f"__post_init__ 2b {cast(ReferenceCommand, cmd).name=!r}")
-                        self.chunk_map.setdefault(cast(ReferenceCommand, cmd).name, [])
+                    reference = cast(ReferenceCommand, cmd)
+                    if not reference.name.endswith('...'):
+                        self.chunk_map.setdefault(reference.name, [])
+                    references.append((c, reference))
                     
-        # Pass 3 -- accumulate chunk lists, output lists, and name definition lists.
-        self.userid_map = defaultdict(list)
-        for c in named_chunks:
-            for name in c.def_names:
-                self.userid_map[name].append(c)
-            if not c.path:
-                # Named ``@@d name`` chunks
-                if full_name := c.full_name:
-                    c.initial = len(self.chunk_map[full_name]) == 0
-                    self.chunk_map[full_name].append(c)
-                    self.logger.debug(f"__post_init__ 3 {c.name=!r} -> {c.full_name=!r}")
-            else:
-                # Output ``@@o`` and anonymous chunks.
-                # Assume all @@o chunks are unique. If they're not, they overwrite each other.
-                # Also, there's not ``full_name`` for these chunks.
-                c.initial = True
-                
-            # TODO: Accumulate all chunks that contribute to a named file...
-
-        # Pass 4 -- set referencedBy a command in a chunk.
+        # Pass 2 -- resolve the names of the ``@@d`` chunks.
+        for c in defined:
+            if c.name:
+                full_name = self.resolve_name(c.name)
+                c.resolved_name = (self.generation, full_name)
+                c.initial = len(self.chunk_map[full_name]) == 0
+                self.chunk_map[full_name].append(c)
+
+        # Pass 3 -- resolve references, and set referencedBy a command in a chunk.
         # ONLY set this in references embedded in named chunk or output chunk.
         # In a generic Chunk (which is text) there's no anchor to refer to.
         # NOTE: Assume single references *only*
         # We should raise an exception when updating a non-None referencedBy value.
         # Or incrementing ref_chunk.references > 1.
-        for c in named_chunks:
-            for cmd in c.commands:
-                if cmd.has_name:
-                    ref_to_list = self.resolve_chunk(cast(ReferenceCommand, cmd).name)
-                    for ref_chunk in ref_to_list:
-                        ref_chunk.referencedBy = c
-                        ref_chunk.references += 1
+        for c, reference in references:
+            full_name = self.resolve_name(reference.name)
+            ref_to_list = self.chunk_map[full_name]
+            reference.resolved = (self.generation, full_name, ref_to_list)
+            for ref_chunk in ref_to_list:
+                ref_chunk.referencedBy = c
+                ref_chunk.references += 1
 @}
 
 The representation of a ``Web`` instance is a sequence of ``Chunk`` instances.
@@ -305,11 +331,25 @@ Name resolution provides only the expanded name.
 Chunk resolution provides the list of chunks that define a name.
 Chunk resolution expands on the basic features of Name resolution.
 
+An abbreviated name is resolved with a sorted index of the names in the ``chunk_map``. 
+The names that start with a given prefix are adjacent in this index. 
+A binary search finds the first of them. Usually there's exactly one, and the search
+takes time proportional to the logarithm of the number of names, instead of a scan of the
+``chunk_map``. An abbreviation that matches several names is an error; the names are reported
+in the order they were defined.
+
 The complex ``target.endswith('...')`` processing only happens once
 during ``__post_init__()`` processing. After the initalization is complete, 
 all ``ReferenceCommand`` objects will have a ``full_name`` attribute
 that avoids the complication of resolving a name with a ``...`` ellipsis.
 
+The ``Chunk`` and ``ReferenceCommand`` objects save the names and chunks they resolve,
+along with the ``generation`` of the ``Web``. 
+Weaving and tangling use these saved values instead of resolving names over and over again.
+Any change to the ``Web`` must call ``invalidate()`` to increment the ``generation``; 
+the saved values are then resolved again when they're next used. 
+Adding a name to the ``chunk_map`` is a change, since it can make an abbreviation ambiguous.
+
 @d Web class...
 @{
     def resolve_name(self, target: str) -> str:
@@ -319,11 +359,7 @@ that avoids the complication of resolving a name with a ``...`` ellipsis.
             return target
         elif target.endswith('...'):
             # The ... is equivalent to regular expression .*
-            matches = list(
-                c_name
-                for c_name in self.chunk_map
-                if c_name.startswith(target[:-3])
-            )
+            matches = self.prefix_matches(target[:-3])
             match : str
             # self.logger.debug(f"resolve_name {target=} {matches=} in self.chunk_map")
             match matches:
@@ -333,6 +369,7 @@ that avoids the complication of resolving a name with a ``...`` ellipsis.
                     else:
                         self.logger.warning(f"resolve_name {target=} unknown")
                         self.chunk_map[target] = []
+                        self.invalidate()
                     match = target
                 case [head]:
                     match = head
@@ -343,14 +380,34 @@ that avoids the complication of resolving a name with a ``...`` ellipsis.
         else:
             self.logger.warning(f"resolve_name {target=} unknown")
             self.chunk_map[target] = []
+            self.invalidate()
             return target
 
+    def prefix_matches(self, prefix: str) -> list[str]:
+        """The names in the ``chunk_map`` which start with the prefix, in the ``chunk_map`` order."""
+        if len(self.name_index) != len(self.chunk_map):
+            # Names are only added to the chunk_map; the index is rebuilt when it grows.
+            self.name_index = sorted(self.chunk_map)
+        start = end = bisect.bisect_left(self.name_index, prefix)
+        while end < len(self.name_index) and self.name_index[end].startswith(prefix):
+            end += 1
+        matches = self.name_index[start:end]
+        if len(matches) > 1:
+            order = {name: position for position, name in enumerate(self.chunk_map)}
+            matches.sort(key=order.__getitem__)
+        return matches
+        
     def resolve_chunk(self, target: str) -> list["Chunk"]:
         """Map name (short or full) to the defining sequence of chunks."""
         full_name = self.resolve_name(target)
         chunk_list = self.chunk_map[full_name]
-        self.logger.debug(f"resolve_chunk {target=!r} -> {full_name=!r} -> {chunk_list=}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"resolve_chunk {target=!r} -> {full_name=!r} -> {chunk_list=}")
         return chunk_list
+        
+    def invalidate(self) -> None:
+        """Discard the names and chunks resolved before a change to this web."""
+        self.generation += 1
 @}
 
 The point of the ``Web`` object is to be able to manage a variety of 
@@ -362,6 +419,12 @@ that each ``@@d`` name has one reference. A name with no references
 indicates an omission, a name with multiple references suggests a spelling
 or ellipsis problem.
 
+The ``files``, ``macros``, and ``userids`` tables are used by the ``@@f``, ``@@m``, and ``@@u`` commands.
+The ``reference_graph`` is a ``ReferenceGraph`` built from the ``ReferenceCommand`` instances.
+A document may have several of these commands. Each table is built once, and kept in the ``xref`` mapping.
+The tables are discarded when the ``Web`` is changed -- via ``invalidate()`` -- or chunks are added.
+Since the tables are shared, they must not be modified.
+
 @d Web class...
 @{
     def file_iter(self) -> Iterator[OutputChunk]:
@@ -370,40 +433,61 @@ or ellipsis problem.
     def macro_iter(self) -> Iterator[NamedChunk]:
         return (cast(NamedChunk, c) for c in self.chunks if c.type_is("NamedChunk"))
 
-    def userid_iter(self) -> Iterator[SimpleNamespace]:
-        yield from (SimpleNamespace(def_name=n, chunk=c) for c in self.file_iter() for n in c.def_names)
-        yield from (SimpleNamespace(def_name=n, chunk=c) for c in self.macro_iter() for n in c.def_names)
+    def userid_iter(self) -> Iterator["UserIdDef"]:
+        yield from (UserIdDef(def_name=n, chunk=c) for c in self.file_iter() for n in c.def_names)
+        yield from (UserIdDef(def_name=n, chunk=c) for c in self.macro_iter() for n in c.def_names)
+        
+    def xref_cache(self) -> dict[str, Any]:
+        """The cross-reference tables, emptied if the web has changed since they were built."""
+        key = (self.generation, len(self.chunks))
+        if self.xref_key != key:
+            self.xref = {}
+            self.xref_key = key
+        return self.xref
 
     @@property
     def files(self) -> list["OutputChunk"]:
-        return list(self.file_iter())
+        cache = self.xref_cache()
+        if "files" not in cache:
+            cache["files"] = list(self.file_iter())
+        return cast(list[OutputChunk], cache["files"])
 
     @@property
-    def macros(self) -> list[SimpleNamespace]:
+    def macros(self) -> list["MacroXref"]:
         """
         The chunk_map has the list of Chunks that comprise a macro definition.
         We separate those to make it slightly easier to format the first definition.
         """
-        first_list = (
-            (self.chunk_map[name][0], self.chunk_map[name])
-            for name in sorted(self.chunk_map)
-            if self.chunk_map[name]
-        )
-        macro_list = list(
-            SimpleNamespace(name=first_def.name, full_name=first_def.full_name, seq=first_def.seq, def_list=def_list)
-            for first_def, def_list in first_list
-        )
-        # self.logger.debug(f"macros: {defs}")
-        return macro_list
+        cache = self.xref_cache()
+        if "macros" not in cache:
+            first_list = (
+                (self.chunk_map[name][0], self.chunk_map[name])
+                for name in sorted(self.chunk_map)
+                if self.chunk_map[name]
+            )
+            cache["macros"] = list(
+                MacroXref(name=first_def.name, full_name=first_def.full_name, seq=first_def.seq, def_list=def_list)
+                for first_def, def_list in first_list
+            )
+        return cast(list[MacroXref], cache["macros"])
 
     @@property
-    def userids(self) -> list[SimpleNamespace]:
-        userid_list = list(
-            SimpleNamespace(userid=userid, ref_list=self.userid_map[userid])
-            for userid in sorted(self.userid_map)
-        )
-        # self.logger.debug(f"userids: {userid_list}")
-        return userid_list
+    def userids(self) -> list["UserIdXref"]:
+        cache = self.xref_cache()
+        if "userids" not in cache:
+            cache["userids"] = list(
+                UserIdXref(userid=userid, ref_list=self.userid_map[userid])
+                for userid in sorted(self.userid_map)
+            )
+        return cast(list[UserIdXref], cache["userids"])
+        
+    @@property
+    def reference_graph(self) -> "ReferenceGraph":
+        """The references among chunks, see `The ReferenceGraph Class`_."""
+        cache = self.xref_cache()
+        if "graph" not in cache:
+            cache["graph"] = ReferenceGraph(self)
+        return cast(ReferenceGraph, cache["graph"])
             
     def no_reference(self) -> list[Chunk]:
         return list(filter(lambda c: c.name and not c.path and c.references == 0, self.chunks))
@@ -413,6 +497,289 @@ or ellipsis problem.
 @| Web
 @}
 
+A ``Web`` can be saved in a compiled form, a ``.wc`` file. This can be loaded
+without tokenizing and parsing the source files, and without the ``__post_init__()`` processing.
+It's a pickled ``Web``, which includes the chunks, commands, the ``chunk_map`` and ``userid_map``,
+the sequence numbers, and the reference counts. 
+The ``Chunk`` and ``Command`` objects are pickled without their weak references to the ``Web`` 
+or their loggers. These are rebuilt when the ``Web`` is unpickled.
+
+The file starts with a header, pickled separately, so a stale file can be rejected without 
+unpickling the ``Web``. The header has the following:
+
+-   A ``format`` identifier, and a ``version`` number, ``wc_version``. This number must change
+    when the ``Web``, ``Chunk``, or ``Command`` classes change.
+    
+-   The **py-web-lp** version, and the command character.
+
+-   The resolved path of the top-level ``.w`` file, the ``web_path``. The ``.wc`` file is named for
+    the ``.w`` file, without its directory, so two ``.w`` files with the same name, in different directories, 
+    would otherwise use the same compiled web.
+
+-   The source files: the ``.w`` file and all of the files it includes.
+
+A compiled web is used only when all of these match, and it's newer than all the source files.
+
+@d Web class...
+@{
+    wc_version: ClassVar[int] = 1  #: Version of the ``.wc`` compiled web format.
+
+    def set_web_references(self) -> None:
+        web = ref(self)
+        for c in self.chunks:
+            c.web = web
+            for cmd in c.commands:
+                cmd.web = web
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {k: v for k, v in self.__dict__.items() if k not in {"logger", "xref"}}
+        
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.logger = logging.getLogger("Web")
+        self.xref = {}
+        self.set_web_references()
+
+    def save_compiled(self, path: Path, command: str, sources: list[Path]) -> None:
+        """Writes this web, and the header, to a ``.wc`` file."""
+        header = {
+            "format": "pyweb.wc", "version": self.wc_version, 
+            "pyweb": __version__, "command": command, "source": str(self.web_path.resolve()),
+            "sources": [str(s) for s in sources],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as compiled_file:
+                pickle.dump(header, compiled_file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(self, compiled_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(name, path)
+        except Exception:
+            os.unlink(name)
+            raise
+            
+    @@classmethod
+    def load_compiled(cls, path: Path, command: str, source: Path) -> Optional["Web"]:
+        """
+        Reads a ``.wc`` file, if it's current. 
+        Returns None if it's missing, stale, the wrong version, or compiled from a different source.
+        """
+        try:
+            with path.open("rb") as compiled_file:
+                header = pickle.load(compiled_file)
+                expected = {"format": "pyweb.wc", "version": cls.wc_version, "pyweb": __version__, "command": command}
+                if {k: header.get(k) for k in expected} != expected:
+                    cls.logger.info("Compiled web %s is the wrong version", path)
+                    return None
+                if header.get("source") != str(source.resolve()):
+                    cls.logger.info("Compiled web %s is from %s, not %s", path, header.get("source"), source)
+                    return None
+                mtime = os.fstat(compiled_file.fileno()).st_mtime_ns
+                if not all(Path(s).stat().st_mtime_ns < mtime for s in header["sources"]):
+                    return None
+                return cast(Web, pickle.load(compiled_file))
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            cls.logger.warning("Ignoring compiled web %s: %s", path, ex)
+            return None
+@}
+
+The rows of the cross-reference tables are small records. 
+These are visible to the Jinja templates, which use the attribute names.
+
+@d Cross-reference records...
+@{
+@@dataclass(slots=True)
+class MacroXref:
+    """A row of the ``@@m`` table: a chunk name and the chunks that define it."""
+    name: str | None
+    full_name: str | None
+    seq: int | None
+    def_list: list[Chunk]
+
+@@dataclass(slots=True)
+class UserIdXref:
+    """A row of the ``@@u`` table: a user identifier and the chunks that define it."""
+    userid: str
+    ref_list: list[Chunk]
+
+@@dataclass(slots=True)
+class UserIdDef:
+    """A user identifier defined by a chunk."""
+    def_name: str
+    chunk: Chunk
+@| MacroXref UserIdXref UserIdDef
+@}
+
+The ReferenceGraph Class
+************************
+
+The ``@@< name @@>`` references among chunks form a directed graph. 
+The ``@@o`` chunks are the roots. Each ``@@d`` chunk is, ideally, referred to once, making the graph a tree.
+A chunk which refers to itself, directly or indirectly, is an error: it can't be tangled.
+
+The ``ReferenceGraph`` is built from a linked ``Web``. Each named chunk is a node, identified by
+its sequence number, ``seq``. The anonymous text chunks aren't part of the graph.
+A reference to a name with several defining chunks is an edge to each of those chunks.
+
+-   ``adjacency`` maps each chunk's ``seq`` to the ``seq`` of each chunk it refers to.
+
+-   ``referrers`` is the reverse: the ``seq`` of the chunks which refer to a given chunk.
+
+-   ``components`` is the list of strongly connected components. These are found with Tarjan's algorithm.
+    The algorithm is written with an explicit stack, not recursion; a long chain of references
+    won't exceed Python's recursion limit. 
+    The components are in reverse topological order: a component is after any component it refers to. 
+    
+-   ``order`` is a topological order: each chunk is before the chunks it refers to.
+    The chunks in a cycle are together, in an arbitrary order.
+    
+-   ``cycles`` is the list of components that are cycles: either more than one chunk, or a chunk that refers to itself.
+
+The ``ancestors()`` method finds all of the chunks which refer to a chunk, directly or indirectly.
+This is the set of chunks -- and output files -- that are affected by a change to the chunk.
+The ``descendants()`` method finds all of the chunks to which a chunk refers, directly or indirectly.
+This is the set of chunks expanded when an output file is tangled.
+
+The ``paths_top_down()`` and ``paths_bottom_up()`` methods provide each path of references
+to a chunk. The paths are only computed when they're requested, and only for the chunk and the chunks which refer to it,
+directly or indirectly. These are computed in topological order, using the ``position`` of each chunk in ``order``:
+the paths to a chunk extend the paths to each chunk which refers to it.
+The paths for each chunk are saved, so a later request reuses them.
+A reference within a cycle is ignored, so the paths are finite.
+
+Note that the number of paths to a chunk can grow exponentially, when the chunks referring to it are themselves
+referred to from several places. A template that shows the paths for every chunk will pay this cost; 
+the default templates don't use the paths.
+
+@d ReferenceGraph class...
+@{
+class ReferenceGraph:
+    """The references among the named chunks of a ``Web``."""
+    def __init__(self, web: "Web") -> None:
+        self.chunks: dict[int, Chunk] = {}
+        self.adjacency: dict[int, list[int]] = {}
+        for c in web.chunks:
+            if c.seq is None:
+                # Anonymous text chunks.
+                continue
+            self.chunks[c.seq] = c
+            targets = self.adjacency[c.seq] = []
+            for cmd in c.commands:
+                if cmd.has_name:
+                    targets.extend(cast(int, ref_chunk.seq) for ref_chunk in cast(ReferenceCommand, cmd).chunk_list)
+        self.referrers: dict[int, list[int]] = {seq: [] for seq in self.adjacency}
+        for seq, targets in self.adjacency.items():
+            for target in targets:
+                self.referrers[target].append(seq)
+        self.components = self.strongly_connected()
+        self.order = [seq for component in reversed(self.components) for seq in component]
+        self.cycles = [
+            component 
+            for component in self.components 
+            if len(component) > 1 or component[0] in self.adjacency[component[0]]
+        ]
+        self.position = {seq: i for i, seq in enumerate(self.order)}
+        self.top_down: dict[int, list[list[Chunk]]] = {}
+        self.bottom_up: dict[int, list[list[Chunk]]] = {}
+        
+    def strongly_connected(self) -> list[list[int]]:
+        """Tarjan's algorithm, with an explicit stack of (node, next edge) pairs."""
+        index: dict[int, int] = {}
+        low: dict[int, int] = {}
+        stack: list[int] = []
+        on_stack: set[int] = set()
+        components: list[list[int]] = []
+        for root in self.adjacency:
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, edge = work.pop()
+                if edge == 0:
+                    index[node] = low[node] = len(index)
+                    stack.append(node)
+                    on_stack.add(node)
+                targets = self.adjacency[node]
+                while edge < len(targets):
+                    target = targets[edge]
+                    edge += 1
+                    if target not in index:
+                        # Visit the target, then resume with this node's next edge.
+                        work.append((node, edge))
+                        work.append((target, 0))
+                        break
+                    elif target in on_stack:
+                        low[node] = min(low[node], index[target])
+                else:
+                    # All edges visited.
+                    if low[node] == index[node]:
+                        component: list[int] = []
+                        while (member := stack.pop()) != node:
+                            on_stack.discard(member)
+                            component.append(member)
+                        on_stack.discard(node)
+                        component.append(node)
+                        components.append(sorted(component))
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+        return components
+        
+    def ancestors(self, seq: int) -> set[int]:
+        """The chunks which refer to the given chunk, directly or indirectly."""
+        found: set[int] = set()
+        work = [seq]
+        while work:
+            for referrer in self.referrers[work.pop()]:
+                if referrer not in found:
+                    found.add(referrer)
+                    work.append(referrer)
+        return found
+        
+    def descendants(self, seq: int) -> set[int]:
+        """The chunks to which the given chunk refers, directly or indirectly."""
+        found: set[int] = set()
+        work = [seq]
+        while work:
+            for target in self.adjacency[work.pop()]:
+                if target not in found:
+                    found.add(target)
+                    work.append(target)
+        return found
+        
+    def paths_top_down(self, seq: int) -> list[list[Chunk]]:
+        """Each path of references from an unreferenced chunk down to a chunk that refers to this chunk."""
+        if seq not in self.top_down:
+            # This chunk, and the chunks which refer to it, without saved paths.
+            needed = {seq}
+            work = [seq]
+            while work:
+                for referrer in self.referrers[work.pop()]:
+                    if referrer not in needed and referrer not in self.top_down:
+                        needed.add(referrer)
+                        work.append(referrer)
+            for s in sorted(needed, key=self.position.__getitem__):
+                referrers = [r for r in dict.fromkeys(self.referrers[s]) if self.position[r] < self.position[s]]
+                self.top_down[s] = [path + [self.chunks[r]] for r in referrers for path in self.top_down[r] or [[]]]
+        return self.top_down[seq]
+        
+    def paths_bottom_up(self, seq: int) -> list[list[Chunk]]:
+        """Each path of references from a chunk that refers to this chunk up to an unreferenced chunk."""
+        if seq not in self.bottom_up:
+            self.bottom_up[seq] = [path[::-1] for path in self.paths_top_down(seq)]
+        return self.bottom_up[seq]
+        
+    def describe(self, component: list[int]) -> str:
+        """The names of the chunks in a component, for messages."""
+        return ", ".join(
+            f"{self.chunks[seq].full_name or self.chunks[seq].name!r} ({seq})"
+            for seq in component
+        )
+@| ReferenceGraph
+@}
+
 A ``Web`` instance is built by a ``WebReader``. 
 It's used by an ``Emitter``, including a ``Weaver`` as well as a ``Tangler``.
 A ``Web`` is composed of individual ``Chunk`` instances.
@@ -464,13 +831,27 @@ The attributes are visible to the Jinja templates. In particular the sequence nu
 and the initial definition indicator, ``initial``, are often used to customize presentation of the
 woven content.
 
+The ``referencedBy`` attribute is only one of the references to a chunk; when there are several, it's the last one.
+The ``transitive_referencedBy`` property follows the ``referencedBy`` attributes up to an ``@@o`` chunk.
+It's computed once, without recursion, and saved for the ``Web`` generation.
+The ``ancestry_top_down`` and ``ancestry_bottom_up`` properties have **all** of the paths of references
+to a chunk, from the ``Web`` instance's ``reference_graph``. 
+These support the full path styles of reference for a template.
+
 A ``type_is()`` method is used to discern the various subtypes. This slightly simplifies
 the work done by a template. It's not easy to rely on proper inheritance because the templates
 are implemented in a separate language with their own processing rules.
 
+A large WEB has a great many ``Chunk`` and ``Command`` instances. 
+These classes use ``__slots__`` instead of a per-instance ``__dict__``, to save memory.
+The logger is a class-level attribute, and all of the chunks and commands share 
+a single weak reference to the ``Web``. 
+Because there's no ``__dict__``, the ``__getstate__()`` and ``__setstate__()`` methods
+work with the dataclass fields or the slots.
+
 @d Chunk class hierarchy...
 @{
-@@dataclass
+@@dataclass(slots=True)
 class Chunk:
     """Superclass for OutputChunk, NamedChunk, NamedDocumentChunk.
     """
@@ -507,13 +888,23 @@ class Chunk:
     #: Weak reference to the ``Web`` containing this ``Chunk``.
     web: ReferenceType["Web"] = field(init=False, repr=False)
     
+    #: The ``Web`` generation and the full name resolved in that generation.
+    resolved_name: tuple[int, str] | None = field(init=False, repr=False, compare=False, default=None)
+    
+    #: The ``Web`` generation and the ``transitive_referencedBy`` list computed in that generation.
+    ancestry: tuple[int, list["Chunk"]] | None = field(init=False, repr=False, compare=False, default=None)
+    
     #: Logger for any chunk-specific messages.
-    logger: logging.Logger = field(init=False, default=logging.getLogger("Chunk"))
+    logger: ClassVar[logging.Logger] = logging.getLogger("Chunk")
 
     @@property
     def full_name(self) -> str | None:
         if self.name:
-            return cast(Web, self.web()).resolve_name(self.name)
+            web = cast(Web, self.web())
+            if self.resolved_name is None or self.resolved_name[0] != web.generation:
+                full_name = web.resolve_name(self.name)
+                self.resolved_name = (web.generation, full_name)
+            return self.resolved_name[1]
         else:
             return None
 
@@ -527,14 +918,32 @@ class Chunk:
 
     @@property
     def transitive_referencedBy(self) -> list["Chunk"]:
-        if self.referencedBy:
-            return [self.referencedBy] + self.referencedBy.transitive_referencedBy
-        else:
-            return []
+        """The immediate reference, its immediate reference, and so on. Computed once."""
+        web = cast(Web, self.web())
+        if self.ancestry is None or self.ancestry[0] != web.generation:
+            chain: list[Chunk] = []
+            seen = {id(self)}
+            parent = self.referencedBy
+            while parent and id(parent) not in seen:
+                chain.append(parent)
+                seen.add(id(parent))
+                parent = parent.referencedBy
+            self.ancestry = (web.generation, chain)
+        return self.ancestry[1]
         
-    def add_text(self, text: str, location: tuple[str, int]) -> "Chunk":
+    @@property
+    def ancestry_top_down(self) -> list[list["Chunk"]]:
+        """Each path of references from an ``@@o`` chunk down to a chunk that refers to this chunk."""
+        return cast(Web, self.web()).reference_graph.paths_top_down(cast(int, self.seq))
+
+    @@property
+    def ancestry_bottom_up(self) -> list[list["Chunk"]]:
+        """Each path of references from a chunk that refers to this chunk up to an ``@@o`` chunk."""
+        return cast(Web, self.web()).reference_graph.paths_bottom_up(cast(int, self.seq))
+        
+    def add_text(self, text: str, location: Location) -> "Chunk":
         if self.commands and self.commands[-1].typeid.TextCommand:
-            cast(HasText, self.commands[-1]).text += text
+            self.commands[-1].append_text(text)
         else:
             # Empty list OR previous command was not ``TextCommand``
             self.commands.append(TextCommand(text, location))
@@ -549,6 +958,18 @@ class Chunk:
         Substitution is irrelevant.
         """
         return self.__class__.__name__ == name
+        
+    def __getstate__(self) -> dict[str, Any]:
+        """Omit the web when pickling, see `The ParseCache Class`_."""
+        return {
+            f.name: getattr(self, f.name) 
+            for f in fields(self) 
+            if f.name != "web" and hasattr(self, f.name)
+        }
+        
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
 @}
 
 The subclasses do little more than partition thd Chunks in a way
@@ -561,6 +982,8 @@ a ``path`` property and not having a ``full_name`` property.
 @{
 class OutputChunk(Chunk):
     """An output file."""
+    __slots__ = ()
+    
     @@property
     def path(self) -> Path | None:
         if self.name:
@@ -572,9 +995,9 @@ class OutputChunk(Chunk):
     def full_name(self) -> str | None:
         return None
 
-    def add_text(self, text: str, location: tuple[str, int]) -> Chunk:
+    def add_text(self, text: str, location: Location) -> Chunk:
         if self.commands and self.commands[-1].typeid.CodeCommand:
-            cast(HasText, self.commands[-1]).text += text
+            self.commands[-1].append_text(text)
         else:
             # Empty list OR previous command was not ``CodeCommand``
             self.commands.append(CodeCommand(text, location))
@@ -582,9 +1005,11 @@ class OutputChunk(Chunk):
              
 class NamedChunk(Chunk): 
     """A defined name with code."""
-    def add_text(self, text: str, location: tuple[str, int]) -> Chunk:
+    __slots__ = ()
+    
+    def add_text(self, text: str, location: Location) -> Chunk:
         if self.commands and self.commands[-1].typeid.CodeCommand:
-            cast(HasText, self.commands[-1]).text += text
+            self.commands[-1].append_text(text)
         else:
             # Empty list OR previous command was not ``CodeCommand``
             self.commands.append(CodeCommand(text, location))
@@ -592,11 +1017,11 @@ class NamedChunk(Chunk):
              
 class NamedChunk_Noindent(Chunk):
     """A defined name with code and the -noIndent option."""
-    pass
+    __slots__ = ()
 
 class NamedDocumentChunk(Chunk): 
     """A defined name with text."""
-    pass
+    __slots__ = ()
 @| Chunk NamedChunk OutputChunk NamedChunk_Noindent NamedDocumentChunk
 @}
 
@@ -690,6 +1115,8 @@ the the definitions of the various ``Command`` subclasses.
 @{
 @<The TypeId Class -- to help the template engine@>
 
+@<The Location Type Hint -- a resolved or unresolved position in the input@>
+
 @<The Command Abstract Base Class@>
 
 @<The HasText Type Hint -- used instead of another abstract class@>
@@ -778,22 +1205,83 @@ The Command Class
 The ``Command`` class is abstract, and describes 
 most of the features of the various subclasses.
 
+The ``TextCommand`` and ``CodeCommand`` subclasses have a body of text. The tokenizer provides this text
+in small pieces, each line is at least two tokens. Concatenating each piece to a string
+would take time proportional to the square of the length of the text. Instead, the pieces are kept
+in a list, ``parts``, by the ``append_text()`` method. The ``text`` property joins them into a single
+string the first time the text is used.
+
+Each command has a location in the input, used for error messages and woven output.
+The ``WebReader`` doesn't compute the line number for each command it creates.
+It provides a ``(LineIndex, offset)`` pair; the offset is the character position in the file.
+The ``location`` property uses the ``LineIndex`` to translate this into a ``(filename, line number)`` 
+pair the first time it's needed. A command can also be built with the ``(filename, line number)`` pair directly.
+
+Like the ``Chunk`` classes, the ``Command`` classes use ``__slots__``. Each subclass 
+must define ``__slots__``, even if it's empty, to avoid a per-instance ``__dict__``.
+Each subclass has a class-level logger, named for the class.
+
+@d The Location Type Hint...
+@{
+Location = tuple[str, int] | tuple["LineIndex", int]
+@}
+
 @d The Command Abstract Base Class...
 @{
 class Command(metaclass=TypeIdMeta):
     typeid: TypeId
     has_name: TypeGuard["ReferenceCommand"] = False
     has_text: TypeGuard[Union["CodeCommand", "TextCommand"]] = False
+    logger: ClassVar[logging.Logger] = logging.getLogger("Command")
+    __slots__ = ("_location", "web", "parts")
+    
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.logger = logging.getLogger(cls.__name__)
         
-    def __init__(self, location: tuple[str, int]) -> None:
-        self.location = location  #: The (filename, line number)
-        self.logger = logging.getLogger(self.__class__.__name__)
+    def __init__(self, location: Location) -> None:
+        self._location = location  #: The (filename, line number), or (LineIndex, offset)
         self.web: ReferenceType["Web"]
-        self.text: str  #: The body of this command
+        self.parts: list[str]  #: The body of this command, in pieces
+        
+    @@property
+    def text(self) -> str:
+        """The body of this command, joined from the pieces on first use."""
+        if len(self.parts) != 1:
+            self.parts = ["".join(self.parts)]
+        return self.parts[0]
+        
+    @@text.setter
+    def text(self, text: str) -> None:
+        self.parts = [text]
+        
+    def append_text(self, text: str) -> None:
+        self.parts.append(text)
+        
+    @@property
+    def location(self) -> tuple[str, int]:
+        """The (filename, line number), resolved from the offset on first use."""
+        source, line = self._location
+        if isinstance(source, LineIndex):
+            source, line = self._location = source.location(line)
+        return source, line
         
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(location={self.location!r})"
         
+    def __getstate__(self) -> dict[str, Any]:
+        """Omit the web when pickling, see `The ParseCache Class`_."""
+        return {
+            name: getattr(self, name)
+            for cls in self.__class__.__mro__
+            for name in getattr(cls, "__slots__", ())
+            if name != "web" and hasattr(self, name)
+        }
+        
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+        
     @@abc.abstractmethod
     def tangle(self, aTangler: "Tangler", target: TextIO) -> None:
         ...
@@ -823,8 +1311,9 @@ chunks. These are **not** tangled, and an exception is raised.
 class TextCommand(Command):
     """Text outside any other command."""    
     has_text: TypeGuard[Union["CodeCommand", "TextCommand"]] = True
+    __slots__ = ()
     
-    def __init__(self, text: str, location: tuple[str, int]) -> None:
+    def __init__(self, text: str, location: Location) -> None:
         super().__init__(location)
         self.text = text  #: The text
             
@@ -848,13 +1337,15 @@ chunks. These are tangled without change.
 class CodeCommand(Command):
     """Code inside a ``@@o``, or ``@@d`` command."""    
     has_text: TypeGuard[Union["CodeCommand", "TextCommand"]] = True
+    __slots__ = ()
 
-    def __init__(self, text: str, location: tuple[str, int]) -> None:
+    def __init__(self, text: str, location: Location) -> None:
         super().__init__(location)
         self.text = text  #: The text
 
     def tangle(self, aTangler: "Tangler", target: TextIO) -> None:
-        self.logger.debug(f"tangle {self.text=!r}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"tangle {self.text=!r}")
         aTangler.codeBlock(target, self.text)
 
     def __repr__(self) -> str:
@@ -878,26 +1369,45 @@ class ReferenceCommand(Command):
     In text, it can weave to the text of a ``NamedDocumentChunk``.
     """    
     has_name: TypeGuard["ReferenceCommand"] = True
+    __slots__ = ("name", "resolved")
 
-    def __init__(self, name: str, location: tuple[str, int]) -> None:
+    def __init__(self, name: str, location: Location) -> None:
         super().__init__(location)
         self.name = name  #: The name that is referenced.
+        #: The ``Web`` generation, and the full name and chunks resolved in that generation.
+        self.resolved: tuple[int, str, list["Chunk"]] | None = None
+        
+    def resolve(self) -> tuple[str, list["Chunk"]]:
+        """The full name and the defining chunks, resolved once for each generation of the ``Web``."""
+        web = cast(Web, self.web())
+        if self.resolved is None or self.resolved[0] != web.generation:
+            full_name = web.resolve_name(self.name)
+            chunk_list = web.resolve_chunk(full_name)
+            self.resolved = (web.generation, full_name, chunk_list)
+        return self.resolved[1], self.resolved[2]
     
     @@property
     def full_name(self) -> str:
-        return cast(Web, self.web()).resolve_name(self.name)
+        return self.resolve()[0]
+        
+    @@property
+    def chunk_list(self) -> list["Chunk"]:
+        return self.resolve()[1]
 
     @@property
     def seq(self) -> int | None:
-        return cast(Web, self.web()).resolve_chunk(self.name)[0].seq
+        return self.chunk_list[0].seq
 
     def tangle(self, aTangler: "Tangler", target: TextIO) -> None:
         """Expand this reference.
         The starting position is the indentation for all **subsequent** lines.
         Provide the indent before ``@@<``, in ``tangler.fragment`` back to the tangler. 
+        The commands of the referenced chunks are tangled next, by the tangler,
+        which does the ``clrIndent()`` when they're finished.
         """
-        self.logger.debug(f"tangle reference to {self.name=}, context: {aTangler.fragment=}")
-        chunk_list = cast(Web, self.web()).resolve_chunk(self.name)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"tangle reference to {self.name=}, context: {aTangler.fragment=}")
+        chunk_list = self.chunk_list
         if len(chunk_list) == 0:
             message = f"Attempt to tangle an undefined Chunk, {self.name!r}"
             self.logger.error(message)
@@ -906,12 +1416,10 @@ class ReferenceCommand(Command):
         aTangler.addIndent(len(aTangler.fragment))
         aTangler.fragment = ""
 
-        for chunk in chunk_list:
-            # TODO: if chunk.options includes '-indent': do a setIndent before tangling.
-            for command in chunk.commands:
-                command.tangle(aTangler, target)
-                
-        aTangler.clrIndent()
+        # TODO: if chunk.options includes '-indent': do a setIndent before tangling.
+        # A chunk with several references can have its expansion saved and reused.
+        key = self.full_name if chunk_list[0].references > 1 else None
+        aTangler.expand(target, chain.from_iterable(chunk.commands for chunk in chunk_list), key)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(name={self.name!r}, location={self.location!r})"
@@ -930,7 +1438,9 @@ get data about the WEB content.
 @{
 class FileXrefCommand(Command):
     """The ``@@f`` command."""    
-    def __init__(self, location: tuple[str, int]) -> None:
+    __slots__ = ()
+    
+    def __init__(self, location: Location) -> None:
         super().__init__(location)
 
     @@property
@@ -942,11 +1452,13 @@ class FileXrefCommand(Command):
 
 class MacroXrefCommand(Command):
     """The ``@@m`` command."""    
-    def __init__(self, location: tuple[str, int]) -> None:
+    __slots__ = ()
+    
+    def __init__(self, location: Location) -> None:
         super().__init__(location)
 
     @@property
-    def macros(self) -> list[SimpleNamespace]:
+    def macros(self) -> list["MacroXref"]:
         return cast(Web, self.web()).macros
 
     def tangle(self, aTangler: "Tangler", target: TextIO) -> None:
@@ -954,11 +1466,13 @@ class MacroXrefCommand(Command):
 
 class UserIdXrefCommand(Command):
     """The ``@@u`` command."""    
-    def __init__(self, location: tuple[str, int]) -> None:
+    __slots__ = ()
+    
+    def __init__(self, location: Location) -> None:
         super().__init__(location)
 
     @@property
-    def userids(self) -> list[SimpleNamespace]:
+    def userids(self) -> list["UserIdXref"]:
         return cast(Web, self.web()).userids
         
     def tangle(self, aTangler: "Tangler", target: TextIO) -> None:
@@ -989,6 +1503,8 @@ This includes the necessary file naming, opening, writing and closing operations
     Emitter <|-- Tangler
     class TanglerMake
     Tangler <|-- TanglerMake
+    class OutputManifest
+    TanglerMake --> OutputManifest
     
     package jinja {
         class Environment
@@ -1015,10 +1531,13 @@ are displayed.
 @<Tangler Subclass -- emits the output files@> 
 
 @<TanglerMake Subclass -- extends Tangler to avoid touching files that didn't change@>
+
+@<OutputManifest class -- fingerprints of the tangled files@>
 @}
 
 @d Imports
 @{import abc
+import locale
 from textwrap import dedent, shorten
 from jinja2 import Environment, DictLoader, select_autoescape
 @}
@@ -1623,13 +2142,65 @@ to maintain the indentations.
     Tangler --> ReferenceCommand : tangle()
     ReferenceCommand --> Tangler : get len(fragment)
     ReferenceCommand --> Tangler : addIndent(i)
+    ReferenceCommand --> Tangler : expand(commands)
     group [for all] commands in the referenced chunk
-        ReferenceCommand --> Command : tangle()
+        Tangler --> Command : tangle()
     end 
-    ReferenceCommand --> Tangler : clrIndent()
+    Tangler --> Tangler : clrIndent()
 
 This approach can preserves the indentation in front of a ``@@< reference @@>`` command.
 
+The output of an ``@@o`` chunk is tangled into an ``io.StringIO`` buffer, which is written to the file 
+in one operation. This avoids a great many small writes to the file.
+
+A chunk referenced from several places -- a license header, for example -- is expanded once. 
+The expansion of a reference only depends on the indentation in front of the reference:
+each block of code written by ``codeBlock()`` has the prevailing indent, which is the 
+indent at the reference plus an amount that depends only on the referenced chunks.
+While a chunk with more than one reference is expanded, the ``(indent, text)`` blocks are recorded. 
+When the expansion is finished, the blocks, with the indentation relative to the reference,
+and the number of lines, are saved in ``expansions``. A later reference writes these blocks again, with its own indentation,
+instead of tangling the commands. The text for a given indentation is kept in ``rendered``, so a 
+reference at the same indentation is a copy. The saved expansions are discarded by each ``emit()``.
+
+The ``ReferenceCommand`` doesn't tangle the referenced chunks' commands itself. 
+That would be a recursive process, and a deep chain of references would exceed
+Python's recursion limit. Instead, the ``Tangler`` has an explicit stack, ``pending``, of
+iterators over commands. The ``tangle_commands()`` method tangles the next command from the 
+iterator on the top of the stack. A ``ReferenceCommand`` uses ``expand()`` to push an iterator
+over the commands of the referenced chunks. When an iterator pushed by ``expand()`` is exhausted,
+it's popped, and the indentation pushed by the ``ReferenceCommand`` is removed with ``clrIndent()``. 
+The depth of references is limited only by memory.
+A cycle of references would never end; the stack would grow until memory is exhausted. 
+The ``LoadAction`` rejects a web with cycles, but a ``Web`` can be built and tangled without it,
+so ``emit()`` checks the ``reference_graph`` for cycles first, and raises an ``Error``.
+
+The ``@@o`` files are independent of each other. Each ``emit_file()`` starts with ``start_file()``.
+This resets the indentation ``context`` and the ``fragment``, so a file that ends without a newline 
+doesn't change the indentation of the next file. It also empties the ``pending`` stack and stops any recording of
+``blocks``: a file which raised an exception partway through can leave these behind, and the same tangler 
+is used for every web an ``Application`` processes.
+A file's content doesn't depend on the files tangled before it. When ``jobs`` is more than one, 
+``emit()`` tangles the files in a pool of threads. Each file gets a tangler of its own from ``file_tangler()``,
+with its own indentation ``context``, ``fragment``, stack of ``pending`` commands, and saved expansions.
+The ``emit_file()`` method -- including the ``TanglerMake`` comparison and replacement of the file -- 
+runs for each file concurrently. 
+When all the files are written, the counts and the reference names from each file's tangler 
+are merged into this tangler, in the order of the files. 
+The files, and the summary, are the same as tangling the files one at a time.
+If tangling a file raises an exception, the other files are still written, and merged; the exception from 
+the first file, in the order of the files, is raised. A subclass can extend ``merge()`` to collect more 
+from each file's tangler, and ``discard()`` to clean up after a file's tangler that failed.
+
+The ``only`` list of glob patterns selects some of the files. When it's empty, all of the files are tangled. 
+Otherwise, ``selected_files()`` has the files with a name that matches at least one of the patterns, using ``fnmatchcase()``. 
+Since a reference is only expanded when it's tangled, only the chunks needed by the selected files are expanded.
+A pattern that matches no file is likely a mistake, and leads to a warning.
+
+@d Imports
+@{import fnmatch
+@}
+
 @d Tangler Subclass...
 @{
 class Tangler(Emitter):
@@ -1646,20 +2217,146 @@ class Tangler(Emitter):
         self.linesWritten = 0
         self.totalFiles = 0
         self.totalLines = 0
+        # Commands to tangle, one for each reference being expanded: 
+        # (commands, expansion key, start in blocks, indent, linesWritten at start).
+        self.pending: list[tuple[Iterator[Command], str | None, int, int, int]] = []
+        # Saved expansions: (relative indent, text) blocks and line count, and these blocks with an indent.
+        self.expansions: dict[str, tuple[list[tuple[int, str]], int]] = {}
+        self.rendered: dict[tuple[str, int], str] = {}
+        # (indent, text) blocks written while an expansion is being saved.
+        self.recording = 0
+        self.blocks: list[tuple[int, str]] = []
+        # Threads used to tangle the files, zero or one tangles them in order.
+        self.jobs = 0
+        # Glob patterns for the names of the files to tangle, empty tangles all files.
+        self.only: list[str] = []
 
     def emit(self, web: Web) -> None:
-        for file_chunk in web.files:
+        if cycles := web.reference_graph.cycles:
+            for component in cycles:
+                self.logger.error("Reference cycle among %s", web.reference_graph.describe(component))
+            raise Error("Reference cycles in the Web")
+        self.expansions.clear()
+        self.rendered.clear()
+        files = self.selected_files(web)
+        if self.jobs > 1 and len(files) > 1:
+            self.emit_concurrently(web, files)
+            return
+        for file_chunk in files:
             self.logger.info("Tangling %s", file_chunk.name)
             self.emit_file(web, file_chunk)
             
+    def selected_files(self, web: Web) -> list[OutputChunk]:
+        """All of the files, or the files with a name matching a pattern in ``only``."""
+        if not self.only:
+            return web.files
+        for pattern in self.only:
+            if not any(fnmatch.fnmatchcase(file_chunk.name or "", pattern) for file_chunk in web.files):
+                self.logger.warning("No output file matches %r", pattern)
+        return [
+            file_chunk 
+            for file_chunk in web.files 
+            if any(fnmatch.fnmatchcase(file_chunk.name or "", pattern) for pattern in self.only)
+        ]
+            
+    def emit_concurrently(self, web: Web, files: list[OutputChunk]) -> None:
+        """Tangle each file with its own tangler, in a pool of threads, and merge the summaries."""
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="Tangler") as executor:
+            tasks: list[tuple[Tangler, Future[None]]] = []
+            for file_chunk in files:
+                self.logger.info("Tangling %s", file_chunk.name)
+                tangler = self.file_tangler()
+                tasks.append((tangler, executor.submit(tangler.emit_file, web, file_chunk)))
+            error: BaseException | None = None
+            for tangler, task in tasks:
+                if (failure := task.exception()) is not None:
+                    error = error or failure
+                    self.discard(tangler)
+                    continue
+                self.merge(tangler)
+        if error:
+            raise error
+                
+    def merge(self, tangler: "Tangler") -> None:
+        """Add the summary from the tangler for one file to this tangler's summary."""
+        self.reference_names |= tangler.reference_names
+        self.linesWritten += tangler.linesWritten
+        self.totalFiles += tangler.totalFiles
+        self.totalLines += tangler.totalLines
+        
+    def discard(self, tangler: "Tangler") -> None:
+        """Clean up after the tangler for one file, which failed."""
+        pass
+                
+    def file_tangler(self) -> "Tangler":
+        """A tangler with the same class and output directory, for one file."""
+        return type(self)(self.output)
+        
+    def start_file(self) -> None:
+        """Reset the state left by tangling a previous file, even one that failed."""
+        self.resetIndent(self.code_indent)
+        self.fragment = ""
+        self.pending.clear()
+        self.recording = 0
+        self.blocks.clear()
+            
     def emit_file(self, web: Web, file_chunk: Chunk) -> None:
         target_path = self.output / (file_chunk.name or "Untitled.out")
         self.logger.debug("Writing %s", target_path)
-        self.logger.debug("Chunk %r", file_chunk)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Chunk %r", file_chunk)
+        self.start_file()
+        buffer = io.StringIO()
+        self.tangle_commands(buffer, file_chunk.commands)
         with target_path.open("w") as target:
-            # An initial command to provide indentations.
-            for command in file_chunk.commands:
+            target.write(buffer.getvalue())
+            
+    def tangle_commands(self, target: TextIO, commands: Iterable[Command]) -> None:
+        """Tangle the commands, and the commands of the chunks they refer to."""
+        base = len(self.pending)
+        self.pending.append((iter(commands), None, 0, 0, 0))
+        while len(self.pending) > base:
+            top = self.pending[-1]
+            for command in top[0]:
                 command.tangle(self, target)
+                if self.pending[-1] is not top:
+                    # A reference pushed the commands of the referenced chunks.
+                    break
+            else:
+                self.pending.pop()
+                if len(self.pending) > base:
+                    # The end of the commands of a referenced chunk.
+                    _, key, start, indent, lines = top
+                    if key is not None:
+                        self.expansions[key] = (
+                            [(block_indent - indent, text) for block_indent, text in self.blocks[start:]],
+                            self.linesWritten - lines
+                        )
+                        self.recording -= 1
+                        if not self.recording:
+                            self.blocks.clear()
+                    self.clrIndent()
+            
+    def expand(self, target: TextIO, commands: Iterable[Command], key: str | None = None) -> None:
+        """
+        Tangle these commands next; used by ``ReferenceCommand`` to expand a reference.
+        With a key, the expansion is saved, or a saved expansion is written.
+        """
+        if key is None:
+            self.pending.append((iter(commands), None, 0, 0, 0))
+        elif key in self.expansions:
+            blocks, lines = self.expansions[key]
+            indent = self.context[-1]
+            if (key, indent) not in self.rendered:
+                self.rendered[key, indent] = "".join(indented(text, indent + relative) for relative, text in blocks)
+            target.write(self.rendered[key, indent])
+            if self.recording:
+                self.blocks.extend((indent + relative, text) for relative, text in blocks)
+            self.linesWritten += lines
+            self.clrIndent()
+        else:
+            self.recording += 1
+            self.pending.append((iter(commands), key, len(self.blocks), self.context[-1], self.linesWritten))
                 
     @< Emitter write a block of code with proper indents @>
 
@@ -1703,6 +2400,13 @@ The following two rules apply:
 This a stack, maintained by the Tangler.
 
 
+The whole block is indented and written at once. Every line -- each piece from ``splitlines()`` --
+gets the prevailing indent, including empty lines. Each line ending with ``\n`` is counted.
+A line that doesn't end with ``\n``, almost always the last, sets the ``fragment`` to spaces of the same length.
+This may be used by a following ``ReferenceCommand``. The ``fragment`` is not reset by a complete line.
+
+The debugging message for each line is only built when debugging is enabled for this logger.
+
 @d Emitter write a block of code...
 @{
 def codeBlock(self, target: TextIO, text: str) -> None:
@@ -1711,28 +2415,41 @@ def codeBlock(self, target: TextIO, text: str) -> None:
     
     The ``fragment`` is the prevailing indent used in reference expansion.
     """
-    for line in text.splitlines(keepends=True):
-        self.logger.debug("codeBlock(%r)", line)
-        indent = self.context[-1]
-        if len(line) == 0:
-            # Degenerate case of empty CodeText command. Should not occur.
-            pass
-        elif not line.endswith('\n'):
-            # Possible start of indentation prior to a ``@@<name@@>``
-            target.write(indent*' ')
-            wrote = target.write(line)
-            self.fragment = ' ' * wrote
-            # May be used by a ``ReferenceCommand``, if needed.
-        elif line.endswith('\n'):
-            target.write(indent*' ')
-            target.write(line)
-            self.linesWritten += 1
-        else:
-            raise RuntimeError("Non-exhaustive if statement.")
+    lines = text.splitlines(keepends=True)
+    if not lines:
+        # Degenerate case of empty CodeText command. Should not occur.
+        return
+    if self.logger.isEnabledFor(logging.DEBUG):
+        for line in lines:
+            self.logger.debug("codeBlock(%r)", line)
+    indent = self.context[-1]
+    if self.recording:
+        self.blocks.append((indent, text))
+    target.write(indented(text, indent, lines))
+    newlines = text.count('\n')
+    self.linesWritten += newlines
+    if newlines != len(lines):
+        # Possible start of indentation prior to a ``@@<name@@>``
+        # May be used by a ``ReferenceCommand``, if needed.
+        last = next(line for line in reversed(lines) if not line.endswith('\n'))
+        self.fragment = ' ' * len(last)
 
 @| codeBlock
 @}
 
+The ``indented()`` function puts the indent in front of each line of a block. 
+
+@d Tangler Subclass...
+@{
+def indented(text: str, indent: int, lines: list[str] | None = None) -> str:
+    """The text with spaces in front of each line, from ``splitlines()``."""
+    if not indent:
+        return text
+    prefix = indent * ' '
+    return "".join([prefix + line for line in (lines or text.splitlines(keepends=True))])
+@| indented
+@}
+
 The ``addIndent()`` increments the indent. 
 Used by ``@@<name@@>`` to set a prevailing indent.
 
@@ -1776,49 +2493,288 @@ def resetIndent(self, indent: int = 0) -> None:
 @}
 
 An extension to the ``Tangler`` class that only updates a file if the content has changed.
-This tangles to a temporary file. If the content is identical, the temporary
-file is quietly disposed of. Otherwise, the temporary file is linked to
-the original name.  
 
-Files are compared with the ``filecmp`` module.
+The content is tangled into a buffer. It's encoded into the bytes a text file would have: 
+the line endings are ``os.linesep``, and the encoding is the preferred encoding that ``open()`` uses.
+The SHA-256 hash of these bytes is computed in memory.
+There are two ways to decide the file is unchanged:
+
+-   The ``manifest``, if there is one, has the hash, size, and modification time recorded
+    when the file was last written or found unchanged. If the hash is the same, and the file's 
+    size and modification time haven't changed since then, the file is unchanged. 
+    This costs a ``stat()`` of the file; it isn't read or written.
+
+-   Otherwise, the file's bytes are read and compared with the encoded buffer. 
+    A file with different line endings is different.
+
+An unchanged file is left intact, with all of the operating system creation timestamps
+untouched. Otherwise, the content is written to a temporary file in the same directory as the file,
+and ``os.replace()`` puts it in place of the file. 
+Since the temporary file is on the same file system, the replacement is atomic: a concurrent reader
+sees either the old content or the new content, and the file is never missing. 
+Each temporary file has a unique name, from ``mkstemp()``, so several processes -- from ``make -j``, 
+for example -- can write into the same output directory. If they write the same file, the last
+replacement wins, and it's complete.
+
+With ``fsync`` set, the new content is also synced to storage, in one batch after all of the files are tangled.
+The temporary files are ``staged``, then they're all synced, then they replace the files, and then the directories
+are synced, once each. After a crash, a file has the old content or the new content. Without ``fsync``,
+each temporary file replaces its file as soon as it's written, and the operating system writes them when it's ready.
+A tangler for a single file, created by ``file_tangler()``, stages its files for this tangler to replace.
+
+With a manifest, a file may not need to be tangled at all. The manifest also records the chunks
+expanded into each file, with a hash of each chunk. If the file was tangled from the same chunks,
+with the same content, and it hasn't been touched since, it's left alone without expanding any of the chunks.
+A file that's skipped this way doesn't add to the ``linesWritten`` count.
 
 @d Imports
-@{import filecmp
-import tempfile
+@{import tempfile
 import os
 @}
 
 @d TanglerMake Subclass...
 @{
 class TanglerMake(Tangler):
+    def __init__(self, output: Path = Path.cwd()) -> None:
+        super().__init__(output)
+        self.manifest: OutputManifest | None = None  #: Fingerprints of the files from a previous run
+        self.fsync = False  #: Sync the new files to storage, in one batch
+        #: Temporary files to replace files: (temporary name, file, content hash, chunk digests).
+        self.staged: list[tuple[str, Path, str, dict[str, str]]] = []
+        
+    def emit(self, web: Web) -> None:
+        if self.manifest:
+            self.manifest.load()
+        try:
+            super().emit(web)
+        finally:
+            self.replace_staged()
+            if self.manifest:
+                self.manifest.save()
+                
+    def file_tangler(self) -> Tangler:
+        tangler = cast(TanglerMake, super().file_tangler())
+        tangler.manifest = self.manifest
+        tangler.fsync = self.fsync
+        return tangler
+        
+    def merge(self, tangler: Tangler) -> None:
+        super().merge(tangler)
+        self.staged.extend(cast(TanglerMake, tangler).staged)
+        
+    def discard(self, tangler: Tangler) -> None:
+        for tempname, *_ in cast(TanglerMake, tangler).staged:
+            os.unlink(tempname)
+        
     def emit_file(self, web: Web, file_chunk: Chunk) -> None:
         target_path = self.output / (file_chunk.name or "Untitled.out")
+        chunks = self.manifest.chunk_digests(web, file_chunk) if self.manifest else {}
+        if self.manifest and self.manifest.current(target_path, chunks):
+            self.logger.info("Unchanged '%s', not tangled", target_path)
+            return
+            
         self.logger.debug("Writing %s via a temp file", target_path)
-        self.logger.debug("Chunk %r", file_chunk)
-
-        fd, tempname = tempfile.mkstemp(dir=os.curdir)
-        with os.fdopen(fd, "w") as target:
-            for command in file_chunk.commands:
-                command.tangle(self, target)
-                
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Chunk %r", file_chunk)
+        self.start_file()
+        buffer = io.StringIO()
+        self.tangle_commands(buffer, file_chunk.commands)
+        content = buffer.getvalue().replace("\n", os.linesep).encode(locale.getpreferredencoding(False))
+        digest = hashlib.sha256(content).hexdigest()
+        
+        if self.unchanged(target_path, content, digest):
+            self.logger.info("Unchanged '%s'", target_path)
+            if self.manifest:
+                self.manifest.record(target_path, digest, chunks)
+            return
+            
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tempname = tempfile.mkstemp(dir=target_path.parent, prefix=f".{target_path.name}.", suffix=".tmp")
         try:
-            same = filecmp.cmp(tempname, target_path)
-        except OSError as e:
-            same = False  # Doesn't exist. (Could check for errno.ENOENT)
+            with os.fdopen(fd, "wb") as target:
+                target.write(content)
+        except Exception:
+            os.unlink(tempname)
+            raise
+        self.staged.append((tempname, target_path, digest, chunks))
+        if not self.fsync:
+            self.replace_staged()
+        self.logger.info("Wrote %d lines to %s", self.linesWritten, target_path)
             
-        if same:
-            self.logger.info("Unchanged '%s'", target_path)
-            os.remove(tempname)
-        else:
-            # Windows requires the original file name be removed first.
-            try: 
-                target_path.unlink()
-            except OSError as e:
-                pass  # Doesn't exist. (Could check for errno.ENOENT)
-            target_path.parent.mkdir(parents=True, exist_ok=True)
-            target_path.hardlink_to(tempname)
-            os.remove(tempname)
-            self.logger.info("Wrote %d lines to %s", self.linesWritten, target_path)
+    def replace_staged(self) -> None:
+        """Replace each file with its temporary file. With ``fsync``, sync the files, and then their directories."""
+        staged, self.staged = self.staged, []
+        if self.fsync:
+            for tempname, *_ in staged:
+                fd = os.open(tempname, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+        for tempname, target_path, digest, chunks in staged:
+            os.replace(tempname, target_path)
+            if self.manifest:
+                self.manifest.record(target_path, digest, chunks)
+        if self.fsync:
+            for directory in dict.fromkeys(target_path.parent for _, target_path, _, _ in staged):
+                try:
+                    fd = os.open(directory, os.O_RDONLY)
+                except OSError:
+                    continue  # Windows can't open a directory.
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            
+    def unchanged(self, target_path: Path, content: bytes, digest: str) -> bool:
+        """Does the file have the tangled content? Uses the manifest, or reads the file."""
+        if self.manifest and self.manifest.unchanged(target_path, digest):
+            return True
+        try:
+            return target_path.read_bytes() == content
+        except OSError as e:
+            return False  # Doesn't exist.
+@| TanglerMake
+@}
+
+The OutputManifest Class
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+The ``OutputManifest`` keeps the ``Fingerprint`` of each tangled file between runs:
+the path, size, modification time, and the SHA-256 hash of the content. 
+These are the same fingerprints the ``ParseCache`` uses for input files.
+
+The manifest is a JSON document, with a ``format`` identifier and a ``version`` number, 
+so a manifest from an incompatible release is ignored. A missing or damaged manifest is
+also ignored; every file is then compared with the tangled text.
+
+For each file, the manifest also has the chunks expanded into the file, from the ``Web`` instance's 
+``reference_graph``. These are the ``@@o`` chunk and its ``descendants()``. 
+The chunks are grouped by name, since a name can be defined by several chunks, and the digest of each name is 
+the SHA-256 hash of the digests of its chunks, in order. A chunk's digest is a hash of its class, name, options, 
+and the text, or referenced name, of each of its commands. 
+The digests of the chunks are saved in ``digests`` for the current run, since many files expand the same chunks.
+An edit to a ``@@d`` chunk changes the digest of its name in each file which expands it, and only those files 
+are tangled again. 
+
+The tangled text depends on the **py-web-lp** release, too. A manifest written by another release is ignored.
+
+The concurrent tanglers share one manifest. Each file has a distinct key, and 
+the ``record()`` method replaces items in the ``outputs`` and ``chunks`` dictionaries with single assignments.
+
+The manifest is written to a temporary file, which replaces the previous manifest, 
+so an interrupted run doesn't leave a damaged manifest. It's only written if something was recorded.
+
+@d Imports
+@{import json
+@}
+
+@d OutputManifest class...
+@{
+class OutputManifest:
+    """The fingerprints of the tangled files, and the chunks expanded into them, saved between runs."""
+    version = 1  #: Change when the format of the manifest changes.
+    
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.logger = logging.getLogger(self.__class__.__qualname__)
+        self.outputs: dict[str, Fingerprint] = {}
+        self.chunks: dict[str, dict[str, str]] = {}  #: Digest of each chunk name expanded into a file
+        self.digests: dict[int, str] = {}  #: Digest of each chunk, by sequence number, for this run
+        self.changed = False
+        
+    def load(self) -> None:
+        self.outputs, self.chunks, self.digests, self.changed = {}, {}, {}, False
+        try:
+            document = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as ex:
+            self.logger.warning("Ignoring manifest %s: %s", self.path, ex)
+            return
+        expected = ("pyweb.manifest", self.version, __version__)
+        if not isinstance(document, dict) or (document.get("format"), document.get("version"), document.get("pyweb")) != expected:
+            self.logger.warning("Ignoring manifest %s: not version %d of %s", self.path, self.version, __version__)
+            return
+        try:
+            outputs = {
+                name: (str(name), int(size), int(mtime), str(digest))
+                for name, (_, size, mtime, digest) in document["outputs"].items()
+            }
+            chunks = {name: dict(digests) for name, digests in document["chunks"].items()}
+        except (KeyError, TypeError, ValueError, AttributeError) as ex:
+            self.logger.warning("Ignoring manifest %s: %r", self.path, ex)
+            return
+        self.outputs, self.chunks = outputs, chunks
+        
+    def unchanged(self, target_path: Path, digest: str) -> bool:
+        """Does the file still have the content with this hash?"""
+        fingerprint = self.outputs.get(str(target_path))
+        return fingerprint is not None and fingerprint[3] == digest and self.untouched(fingerprint)
+        
+    def current(self, target_path: Path, chunks: dict[str, str]) -> bool:
+        """Was the file tangled from these chunks, and not touched since?"""
+        fingerprint = self.outputs.get(str(target_path))
+        return fingerprint is not None and self.chunks.get(str(target_path)) == chunks and self.untouched(fingerprint)
+        
+    def untouched(self, fingerprint: "Fingerprint") -> bool:
+        """Does the file have the size and modification time in the fingerprint?"""
+        name, size, mtime, _ = fingerprint
+        try:
+            stat = Path(name).stat()
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == (size, mtime)
+        
+    def chunk_digests(self, web: Web, file_chunk: Chunk) -> dict[str, str]:
+        """The digest of each name expanded into a file, including the file's own chunk."""
+        graph = web.reference_graph
+        seq = cast(int, file_chunk.seq)
+        names: dict[str, Any] = {}
+        for chunk in (graph.chunks[s] for s in sorted({seq} | graph.descendants(seq))):
+            name = chunk.full_name or cast(str, chunk.name)
+            names.setdefault(name, hashlib.sha256()).update(self.chunk_digest(chunk).encode("ascii"))
+        return {name: digest.hexdigest() for name, digest in names.items()}
+        
+    def chunk_digest(self, chunk: Chunk) -> str:
+        seq = cast(int, chunk.seq)
+        if seq not in self.digests:
+            content = (
+                chunk.__class__.__name__, chunk.name, chunk.options, chunk.comment_start, chunk.comment_end,
+                [
+                    (command.__class__.__name__, getattr(command, "text", None) or getattr(command, "name", None)) 
+                    for command in chunk.commands
+                ]
+            )
+            self.digests[seq] = hashlib.sha256(repr(content).encode("utf-8")).hexdigest()
+        return self.digests[seq]
+        
+    def record(self, target_path: Path, digest: str, chunks: dict[str, str] | None = None) -> None:
+        """Saves the fingerprint of a file that has the content with this hash, and the chunks it was tangled from."""
+        stat = target_path.stat()
+        self.outputs[str(target_path)] = (str(target_path), stat.st_size, stat.st_mtime_ns, digest)
+        if chunks:
+            self.chunks[str(target_path)] = chunks
+        self.changed = True
+        
+    def save(self) -> None:
+        if not self.changed:
+            return
+        document = {
+            "format": "pyweb.manifest", "version": self.version, "pyweb": __version__, 
+            "outputs": self.outputs, "chunks": self.chunks
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as manifest_file:
+                json.dump(document, manifest_file, indent=2, sort_keys=True)
+            os.replace(name, self.path)
+        except Exception:
+            os.unlink(name)
+            raise
+        self.changed = False
+@| OutputManifest
 @}
 
 Input Parsing
@@ -1855,6 +2811,16 @@ We'll start with the ``WebReader`` class definition
 @{
 @<Tokenizer class - breaks input into tokens@>
 
+@<IncludePrefetch class - reads included files concurrently@>
+
+@<ParseCache class - saves the chunks parsed from each file@>
+
+@<IncludeRegistry class - reuses the chunks from included files@>
+
+@<WebReader expression evaluation context@>
+
+@<ChunkOptionParser class - parses the options for a chunk@>
+
 @<WebReader class - parses the input file, building the Web structure@>
 @}
 
@@ -1903,13 +2869,16 @@ The commands have three general types:
 -   "Content" commands generate woven content. These include 
     the various cross-reference commands (``@@f``, ``@@m`` and ``@@u``).  
 
-There are two class-level ``argparse.ArgumentParser`` instances used by this class.
+There are two class-level ``ChunkOptionParser`` instances used by this class.
+These are shared by all of the ``WebReader`` instances, including the readers for ``@@i`` files.
 
-:output_option_parser:
-    An ``argparse.ArgumentParser`` used to parse the ``@@o`` command's options.
+:output_options:
+    A ``ChunkOptionParser`` used to parse the ``@@o`` command's options.
+    Its ``argparse.ArgumentParser`` is also available as ``output_option_parser``.
     
-:definition_option_parser:
-    An ``argparse.ArgumentParser`` used to parse the ``@@d`` command's options.
+:definition_options:
+    A ``ChunkOptionParser`` used to parse the ``@@d`` command's options.
+    Its ``argparse.ArgumentParser`` is also available as ``definition_option_parser``.
 
 The class has the following attributes:
 
@@ -1953,6 +2922,14 @@ class WebReader:
     base_path: Path  
     #: The tokenizer used to find commands
     tokenizer: Tokenizer  
+    #: Tokenize files from a memory map instead of reading the text
+    mapped: bool
+    #: Threads used to read @@i files ahead of the parser, zero reads them in order
+    jobs: int
+    #: Saved chunks for unchanged files, None parses every file
+    cache: Optional["ParseCache"]
+    #: Chunks from included files, shared by a reader and all its children
+    registry: "IncludeRegistry"
     
     # State of the reader
     #: Parent context for @@i commands      
@@ -1963,34 +2940,47 @@ class WebReader:
     _source: TextIO  
     #: The sequence of Chunk instances being built
     content: list[Chunk] 
+    #: Included files being read ahead of the parser
+    prefetch: Optional["IncludePrefetch"]
+    
+    # Option parsing, shared by all readers
+    #: Options for ``@@o``
+    output_options = ChunkOptionParser(values={"-start": None, "-end": ""})
+    output_option_parser = output_options.parser
+    #: Options for ``@@d``
+    # TODO: Allow a numeric argument value in ``-indent``
+    definition_options = ChunkOptionParser(flags=("-indent", "-noindent"))
+    definition_option_parser = definition_options.parser
     
     def __init__(self, parent: Optional["WebReader"] = None) -> None:
         self.logger = logging.getLogger(self.__class__.__qualname__)
 
-        self.output_option_parser = argparse.ArgumentParser(add_help=False, exit_on_error=False)
-        self.output_option_parser.add_argument("-start", dest='start', type=str, default=None)
-        self.output_option_parser.add_argument("-end", dest='end', type=str, default="")
-        self.output_option_parser.add_argument("argument", type=str, nargs="*")
-
-        # TODO: Allow a numeric argument value in ``-indent``
-        self.definition_option_parser = argparse.ArgumentParser(add_help=False, exit_on_error=False)
-        self.definition_option_parser.add_argument("-indent", dest='indent', action='store_true', default=False)
-        self.definition_option_parser.add_argument("-noindent", dest='noindent', action='store_true', default=False)
-        self.definition_option_parser.add_argument("argument", type=str, nargs="*")
-
         # Configuration comes from the parent or defaults if there is no parent.
         self.parent = parent
         if self.parent: 
             self.command = self.parent.command
             self.permitList = self.parent.permitList
+            self.mapped = self.parent.mapped
+            self.jobs = self.parent.jobs
+            self.prefetch = self.parent.prefetch
+            self.cache = self.parent.cache
+            self.registry = self.parent.registry
         else: # Defaults until overridden
             self.command = '@@'
             self.permitList = []
+            self.mapped = False
+            self.jobs = 0
+            self.prefetch = None
+            self.cache = None
+            self.registry = IncludeRegistry()
                     
         # Summary
+        self.fileLines = 0
         self.totalLines = 0
         self.totalFiles = 0
         self.errors = 0 
+        self.expressions = 0
+        self.dependencies: list[Fingerprint] = []
         
         @<WebReader command literals@>
         
@@ -1999,6 +2989,10 @@ class WebReader:
         
     @<WebReader location in the input stream@>
     
+    @<WebReader include cycle detection@>
+    
+    @<WebReader expression evaluation globals@>
+    
     @<WebReader load the web@>
     
     @<WebReader handle a command string@>
@@ -2058,11 +3052,11 @@ def handleCommand(self, token: str) -> bool:
         case self.cmdpipe:
             @<assign user identifiers to the current chunk@>
         case self.cmdf:
-            self.content[-1].commands.append(FileXrefCommand(self.location()))
+            self.content[-1].commands.append(FileXrefCommand(self.position()))
         case self.cmdm:
-            self.content[-1].commands.append(MacroXrefCommand(self.location()))
+            self.content[-1].commands.append(MacroXrefCommand(self.position()))
         case self.cmdu:
-            self.content[-1].commands.append(UserIdXrefCommand(self.location()))
+            self.content[-1].commands.append(UserIdXrefCommand(self.position()))
         case self.cmdlangl:
             @<add a reference command to the current chunk@>
         case self.cmdlexpr:
@@ -2085,7 +3079,7 @@ We use the first two tokens to name the ``OutputChunk``.  We expect
 the ``@@{`` separator.  We then attach all subsequent commands
 to this chunk while waiting for the final ``@@}`` token to end the chunk.
 
-We'll use an ``ArgumentParser`` to locate the optional parameters.  This will then let
+We'll use a ``ChunkOptionParser`` to locate the optional parameters.  This will then let
 us build an appropriate instance of ``OutputChunk``.
 
 With some small additional changes, we could use ``OutputChunk(**options)``.
@@ -2094,7 +3088,7 @@ With some small additional changes, we could use ``OutputChunk(**options)``.
 @{
 arg_str = next(self.tokenizer)
 self.expect({self.cmdlcurl})
-options = self.output_option_parser.parse_args(shlex.split(arg_str))
+options = self.output_options.parse(arg_str)
 new_chunk = OutputChunk(
     name=' '.join(options.argument),
     comment_start=options.start if '-start' in options else "# ",
@@ -2128,7 +3122,7 @@ If both are in the options, we should provide a warning.
 @{
 arg_str = next(self.tokenizer)
 brack = self.expect({self.cmdlcurl, self.cmdlbrak})
-options = self.definition_option_parser.parse_args(shlex.split(arg_str))
+options = self.definition_options.parse(arg_str)
 name = ' '.join(options.argument)
 
 if brack == self.cmdlbrak:
@@ -2180,29 +3174,337 @@ can weave the test output file into a final, complete document.
 @d include another file
 @{
 incPath = Path(next(self.tokenizer).strip())
-try:
-    include = WebReader(parent=self)
-    if not incPath.is_absolute():
-        incPath = self.base_path / incPath
-    self.logger.info("Including '%s'", incPath)
-    self.content.extend(include.load(incPath))
-    self.totalLines += include.tokenizer.lineNumber
-    self.totalFiles += include.totalFiles
-    if include.errors:
-        self.errors += include.errors
-        self.logger.error("Errors in included file '%s', output is incomplete.", incPath)
-except Error as e:
-    self.logger.error("Problems with included file '%s', output is incomplete.", incPath)
+if not incPath.is_absolute():
+    incPath = self.base_path / incPath
+if cycle := self.include_cycle(incPath):
+    self.logger.error("Include cycle %s, output is incomplete.", " -> ".join(f"'{p!s}'" for p in cycle))
     self.errors += 1
-except IOError as e:
-    self.logger.error("Problems finding included file '%s', output is incomplete.", incPath)
-    # Discretionary -- sometimes we want to continue
-    if self.cmdi in self.permitList: pass
-    else: raise  # Seems heavy-handed, but, the file wasn't found!
+else:
+    try:
+        include = WebReader(parent=self)
+        self.logger.info("Including '%s'", incPath)
+        self.content.extend(include.load(incPath))
+        self.totalLines += include.fileLines
+        self.totalFiles += include.totalFiles
+        self.dependencies.extend(include.dependencies)
+        self.expressions += include.expressions
+        if include.errors:
+            self.errors += include.errors
+            self.logger.error("Errors in included file '%s', output is incomplete.", incPath)
+    except Error as e:
+        self.logger.error("Problems with included file '%s', output is incomplete.", incPath)
+        self.errors += 1
+    except IOError as e:
+        self.logger.error("Problems finding included file '%s', output is incomplete.", incPath)
+        self.dependencies.append((str(incPath), -1, -1, ""))
+        # Discretionary -- sometimes we want to continue
+        if self.cmdi in self.permitList: pass
+        else: raise  # Seems heavy-handed, but, the file wasn't found!
 # Start a new context for text or commands *after* the ``@@i``.
 self.content.append(Chunk())
 @}
 
+A web with many ``@@i`` commands, on a slow file system, spends most of its load time
+waiting for each included file to be read. The ``IncludePrefetch`` starts reading the 
+included files in a pool of threads as soon as the names are known.
+When a file has been read, it's scanned for its own ``@@i`` commands, and those files 
+are read, also.
+
+The parsing isn't changed. Each file is still parsed, in order, by its own ``WebReader``.
+The only difference is that the text is usually waiting for the parser.
+The chunks, the ``totalFiles`` and ``totalLines`` counts, and the errors are exactly the same as a sequential load. 
+A missing file raises the ``IOError`` when the parser reaches the ``@@i`` command.
+
+Each name is read ahead only once. If a file is included again, or there's a cycle of includes,
+the later ``@@i`` commands read the file when the parser reaches them. 
+
+@d Imports
+@{from concurrent.futures import Future, ThreadPoolExecutor
+import io
+import threading
+@}
+
+@d IncludePrefetch class...
+@{
+class IncludePrefetch:
+    """Reads files, and the files they include, in a pool of threads."""
+    def __init__(self, command: str = '@@', jobs: int | None = None) -> None:
+        self.command = command
+        self.executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="IncludePrefetch")
+        self.pending: dict[Path, Future[str]] = {}
+        self.requested: set[Path] = set()
+        self.lock = threading.Lock()
+        
+    def __enter__(self) -> "IncludePrefetch":
+        return self
+        
+    def __exit__(self, *args: Any) -> Literal[False]:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        return False
+        
+    def request(self, path: Path) -> None:
+        """Start reading a file, unless it was requested before."""
+        with self.lock:
+            if path not in self.requested:
+                self.requested.add(path)
+                self.pending[path] = self.executor.submit(self.read, path)
+            
+    def read(self, path: Path) -> str:
+        text = path.read_text()
+        self.request_includes(path, text)
+        return text
+        
+    def request_includes(self, path: Path, text: str) -> None:
+        """Request each file named by an ``@@i`` command, relative to the including file."""
+        tokens = Tokenizer(io.StringIO(text), self.command)
+        for token in tokens:
+            if token == f"{self.command}i" and (name := next(tokens, "").strip()):
+                include = Path(name)
+                self.request(include if include.is_absolute() else path.parent / include)
+                
+    def source(self, path: Path, source: TextIO | None = None) -> TextIO:
+        """The text of a file, read ahead if possible."""
+        if source:
+            text = source.read()
+            self.request_includes(path, text)
+        else:
+            with self.lock:
+                future = self.pending.pop(path, None)
+            text = future.result() if future else self.read(path)
+        return io.StringIO(text)
+        
+    def discard(self, path: Path) -> None:
+        """The file isn't needed; forget the text read ahead."""
+        with self.lock:
+            future = self.pending.pop(path, None)
+        if future:
+            future.cancel()
+@| IncludePrefetch
+@}
+
+A file that includes itself, directly or through other files, would be loaded
+until Python's recursion limit is reached. Before loading an included file, the reader checks 
+the chain of parent readers. If the file is already being loaded, the cycle is reported as 
+an error, and the file is not included again.
+
+@d WebReader include cycle detection
+@{
+def include_cycle(self, path: Path) -> list[Path]:
+    """The chain of files from an earlier load of ``path`` to ``path``, empty if there's no cycle."""
+    target = path.resolve()
+    chain = [path]
+    reader: Optional[WebReader] = self
+    while reader:
+        chain.append(reader.filePath)
+        if reader.filePath.resolve() == target:
+            return chain[::-1]
+        reader = reader.parent
+    return []
+@| include_cycle
+@}
+
+The IncludeRegistry Class
+**************************
+
+The ``IncludeRegistry`` keeps the chunks from each included file which was loaded without errors.
+This is a ``ParsedFile``, the same structure used by the ``ParseCache``.
+The ``Web`` updates the chunks it's built from, so the registry can't share them. 
+It keeps a pickled copy of each ``ParsedFile``, and each use gets a fresh copy.
+
+The entries are only checked for changes with the size and modification time of each file.
+These are all in-process; the contents were read moments ago.
+
+@d IncludeRegistry class...
+@{
+class IncludeRegistry:
+    """Chunks from included files, reused while the files are unchanged."""
+    def __init__(self) -> None:
+        self.parsed: dict[tuple[Path, str], tuple[list[Fingerprint], bytes]] = {}
+        
+    def fingerprint(self, path: Path) -> Fingerprint:
+        stat = path.stat()
+        return (str(path), stat.st_size, stat.st_mtime_ns, "")
+        
+    def unchanged(self, dependency: Fingerprint) -> bool:
+        name, size, mtime, _ = dependency
+        try:
+            stat = Path(name).stat()
+            return (stat.st_size, stat.st_mtime_ns) == (size, mtime)
+        except OSError:
+            return False
+    
+    def get(self, path: Path, command: str) -> ParsedFile | None:
+        if entry := self.parsed.get((path.resolve(), command)):
+            dependencies, pickled = entry
+            if all(self.unchanged(d) for d in dependencies):
+                return cast(ParsedFile, pickle.loads(pickled))
+        return None
+        
+    def put(self, path: Path, command: str, parsed: ParsedFile) -> None:
+        self.parsed[(path.resolve(), command)] = (parsed.dependencies, pickle.dumps(parsed))
+@| IncludeRegistry
+@}
+
+The ChunkOptionParser Class
+****************************
+
+The ``@@o`` and ``@@d`` commands have options, and a name, parsed by an ``argparse.ArgumentParser``.
+The text is split into words with ``shlex.split()``, which handles quotes.
+A large web has many thousands of ``@@d`` commands, and the argument parser
+is a large part of the time to load it.
+
+Almost all of these commands are simple: a name, with perhaps a few options in front of it.
+The ``ChunkOptionParser`` parses these directly.
+
+-   If there are no quotes or escapes, the words are split on whitespace, 
+    the same as ``shlex.split()``.
+
+-   Flag options (``-indent``, ``-noindent``) and value options (``-start`` *value*, ``-end`` *value*)
+    are taken from the front of the list of words. 
+    
+-   The remaining words are the name. If none of them looks like an option, we're done.
+    
+Anything else is given to the ``argparse.ArgumentParser``. This includes quoted text, 
+abbreviated options, options after the name, and errors. 
+This means the results are exactly the same.
+
+The results are memoized: the same option text gets the same ``argparse.Namespace``.
+The results must not be changed.
+
+@d ChunkOptionParser class...
+@{
+class ChunkOptionParser:
+    """Parses the options and name of a ``@@o`` or ``@@d`` command."""
+    word_pat = re.compile(r"[^ \t\r\n]+")  #: The words that ``shlex.split()`` finds, without quotes.
+    
+    def __init__(self, flags: tuple[str, ...] = (), values: dict[str, str | None] | None = None) -> None:
+        self.flags = flags
+        self.values = values or {}
+        self.defaults: dict[str, Any] = {name[1:]: False for name in self.flags} | {name[1:]: default for name, default in self.values.items()}
+        self.parser = argparse.ArgumentParser(add_help=False, exit_on_error=False)
+        for name in self.flags:
+            self.parser.add_argument(name, dest=name[1:], action='store_true', default=False)
+        for name, default in self.values.items():
+            self.parser.add_argument(name, dest=name[1:], type=str, default=default)
+        self.parser.add_argument("argument", type=str, nargs="*")
+        
+    @@lru_cache(maxsize=4096)
+    def parse(self, arg_str: str) -> argparse.Namespace:
+        if not any(c in arg_str for c in "'\"\\"):
+            words = self.word_pat.findall(arg_str)
+            options = dict(self.defaults)
+            position = 0
+            while position < len(words):
+                word = words[position]
+                if word in self.flags:
+                    options[word[1:]] = True
+                    position += 1
+                elif word in self.values and position+1 < len(words) and not words[position+1].startswith('-'):
+                    options[word[1:]] = words[position+1]
+                    position += 2
+                else:
+                    break
+            argument = words[position:]
+            if not any(word.startswith('-') for word in argument):
+                return argparse.Namespace(**options, argument=argument)
+        return self.parser.parse_args(shlex.split(arg_str))
+@| ChunkOptionParser
+@}
+
+The ParseCache Class
+*********************
+
+Shared boilerplate files are included in many webs, and parsed again by each build.
+The ``ParseCache`` saves the chunks parsed from each file in a directory of pickle files.
+A file's saved chunks are used as long as the file, and all of the files it includes, are unchanged.
+
+Each saved file has a name built from the path and the command character.
+It contains a ``ParsedFile`` with the chunks, the line and file counts, and
+the fingerprints of the file and all of its includes. A fingerprint is
+the path, size, modification time, and SHA-256 hash of the content. 
+A missing include file has a size of -1; these are never saved. 
+The size and modification time are checked first, since they're cheap. The content
+is hashed only when they match.
+
+The ``Command`` and ``Chunk`` objects are pickled without the weak references to the ``Web``
+and without their loggers. A ``Web`` isn't built until the chunks are loaded, and 
+the loggers are recreated from the names.
+
+The cache directory should be private. Loading a pickle file can execute code.
+
+@d Imports
+@{import hashlib
+import pickle
+@}
+
+@d ParseCache class...
+@{
+Fingerprint = tuple[str, int, int, str]
+
+@@dataclass
+class ParsedFile:
+    """The chunks and counts from parsing a file, with its dependencies."""
+    dependencies: list[Fingerprint]
+    content: list[Chunk]
+    fileLines: int
+    totalFiles: int
+    totalLines: int
+
+
+class ParseCache:
+    """Saves the chunks parsed from each file; reuses them while the files are unchanged."""
+    version = 1  #: Change when the ``Chunk`` or ``Command`` classes change.
+    
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.logger = logging.getLogger(self.__class__.__qualname__)
+        
+    def cache_path(self, path: Path, command: str) -> Path:
+        key = hashlib.sha256(f"{path.resolve()}\0{command}".encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.pickle"
+        
+    def fingerprint(self, path: Path) -> Fingerprint:
+        stat = path.stat()
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        return (str(path), stat.st_size, stat.st_mtime_ns, digest)
+        
+    def unchanged(self, dependency: Fingerprint) -> bool:
+        name, size, mtime, digest = dependency
+        try:
+            stat = Path(name).stat()
+            return (
+                (stat.st_size, stat.st_mtime_ns) == (size, mtime) 
+                and hashlib.sha256(Path(name).read_bytes()).hexdigest() == digest
+            )
+        except OSError:
+            return False
+        
+    def get(self, path: Path, command: str) -> ParsedFile | None:
+        try:
+            with self.cache_path(path, command).open("rb") as cache_file:
+                version, parsed = pickle.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            self.logger.warning("Ignoring cache for %s: %s", path, ex)
+            return None
+        if version == (self.version, __version__) and all(self.unchanged(d) for d in parsed.dependencies):
+            return cast(ParsedFile, parsed)
+        return None
+        
+    def put(self, path: Path, command: str, parsed: ParsedFile) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as cache_file:
+                pickle.dump(((self.version, __version__), parsed), cache_file)
+            os.replace(name, self.cache_path(path, command))
+        except Exception:
+            os.unlink(name)
+            raise
+@| Fingerprint ParsedFile ParseCache
+@}
+
 When a ``@@}`` or ``@@]`` are found, this finishes a named chunk.  The next
 text is therefore part of an anonymous chunk.
 
@@ -2251,7 +3553,7 @@ tokens from the input, the middle token is the referenced name.
 # get the name, introduce into the named Chunk dictionary
 name = next(self.tokenizer).strip()
 closing = self.expect({self.cmdrangl})
-self.content[-1].commands.append(ReferenceCommand(name, self.location()))
+self.content[-1].commands.append(ReferenceCommand(name, self.position()))
 self.logger.debug("Reading %r %r", name, closing)
 @}
 
@@ -2283,27 +3585,53 @@ import platform
 @| builtins sys platform
 @}
 
-**TODO:** Appening the text should be a method of a Chunk -- either append text, or append a command.
+The context for evaluating an expression has two parts.
 
-@d add an expression command...
+-   The builtins, without the dangerous ones. This is the same for every expression, and 
+    is built once.
+    
+-   The globals. Most of these are the same for every expression in a file. These are built
+    the first time an expression is evaluated in a file. The ``theLocation`` value is updated
+    for each expression. Each evaluation gets its own copy of the globals, so a name assigned
+    by one expression isn't seen by the next.
+    
+The expressions in a templated web are often repeated. Each distinct expression is compiled once;
+the compiled code for the most recently used expressions is kept by an LRU cache.
+Like ``eval()`` of a string, leading spaces and tabs are removed, so ``@@( 2+3 @@)`` is an expression, 
+not an unexpected indent.
+
+@d Imports
+@{from functools import lru_cache
+@}
+
+@d WebReader expression evaluation context
 @{
-# get the Python expression, create the expression result
-expression = next(self.tokenizer)
-self.expect({self.cmdrexpr})
-try:
-    # Build Context
-    # **TODO:** Parts of this are static and can be built as part of ``__init__()``.
-    dangerous = {
-        'breakpoint', 'compile', 'eval', 'exec', 'execfile', 'globals', 'help', 'input', 
-        'memoryview', 'open', 'print', 'super', '__import__'
-    }
-    safe = types.SimpleNamespace(**dict(
-        (name, obj) 
-        for name,obj in builtins.__dict__.items() 
-        if name not in dangerous
-    ))
-    globals = dict(
-        __builtins__=safe, 
+#: Builtins which are not available to an ``@@(expression@@)``.
+dangerous_builtins = {
+    'breakpoint', 'compile', 'eval', 'exec', 'execfile', 'globals', 'help', 'input', 
+    'memoryview', 'open', 'print', 'super', '__import__'
+}
+
+#: Builtins which are available to an ``@@(expression@@)``.
+safe_builtins = {
+    name: obj
+    for name, obj in builtins.__dict__.items()
+    if name not in dangerous_builtins
+}
+
+@@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> types.CodeType:
+    """Compiles the text of an ``@@(expression@@)``."""
+    return compile(expression.lstrip(" \t"), "<expression>", "eval")
+@| dangerous_builtins safe_builtins compile_expression
+@}
+
+@d WebReader expression evaluation globals
+@{
+def expression_context(self) -> dict[str, Any]:
+    """The globals for evaluating an ``@@(expression@@)`` in the current file."""
+    return dict(
+        __builtins__=safe_builtins, 
         os=types.SimpleNamespace(path=os.path, getcwd=os.getcwd, name=os.name),
         time=time,
         datetime=datetime,
@@ -2313,15 +3641,33 @@ try:
         thisApplication=sys.argv[0],
         __version__=__version__,  # Legacy compatibility. Deprecated.
         version=__version__,
-        theLocation=str(self.location()),  # The only thing that's dynamic
-        )
-    # Evaluate
-    result = str(eval(expression, globals))
+    )
+@| expression_context
+@}
+
+**TODO:** Appening the text should be a method of a Chunk -- either append text, or append a command.
+
+The result of an expression can be different every time it's evaluated; ``time.time()``, for example.
+The ``expressions`` count is the number of expressions evaluated in this file and the files it includes.
+A file with expressions isn't saved in the ``ParseCache`` or the ``IncludeRegistry``.
+
+@d add an expression command...
+@{
+# get the Python expression, create the expression result
+expression = next(self.tokenizer)
+self.expect({self.cmdrexpr})
+self.expressions += 1
+try:
+    if self.expression_globals is None:
+        self.expression_globals = self.expression_context()
+    # The only thing that's dynamic
+    globals = self.expression_globals | {"theLocation": str(self.location())}
+    result = str(eval(compile_expression(expression), globals))
 except Exception as exc:
     self.logger.error('Failure to process %r: exception is %r', expression, exc)
     self.errors += 1
     result = f"@@({expression!r}: Error {exc!r}@@)"
-self.content[-1].add_text(result, self.location())
+self.content[-1].add_text(result, self.position())
 @}
 
 A double command sequence (``'@@@@'``, when the command is an ``'@@'``) has the
@@ -2335,7 +3681,7 @@ create a new, empty ``TextCommand`` or ``CodeCommand``.
 @d double at-sign replacement...
 @{
 self.logger.debug(f"double-command: {self.content[-1]=}")
-self.content[-1].add_text(self.command, self.location())
+self.content[-1].add_text(self.command, self.position())
 @}
 
 The ``expect()`` method examines the 
@@ -2368,11 +3714,17 @@ The ``location()`` provides the file name and line number.
 This allows error messages as well as tangled or woven output 
 to correctly reference the original input files.
 
+The ``position()`` is the unresolved form of the location, used for each new ``Command``.
+The line number is only computed when a command's ``location`` is used.
+
 @d WebReader location...
 @{
 def location(self) -> tuple[str, int]:
-    return (str(self.filePath), self.tokenizer.lineNumber+1)
-@| location
+    return self.tokenizer.index.location(self.tokenizer.offset)
+    
+def position(self) -> Location:
+    return (self.tokenizer.index, self.tokenizer.offset)
+@| location position
 @}
 
 The ``load()`` method reads the entire input file as a sequence
@@ -2385,6 +3737,33 @@ was unknown, and we write a warning but treat it as text.
 The ``load()`` method is used recursively to handle the ``@@i`` command. The issue
 is that it's always loading a single top-level web. 
 
+When ``mapped`` is set, a file is not read as text. It's memory-mapped, and the
+``MappedTokenizer`` decodes each token from the map. This avoids building a copy of a large
+file in memory. An explicit ``source`` is always read as text. An empty file can't be mapped;
+it's read as text, also.
+
+When ``jobs`` is non-zero, the top-level ``load()`` creates an ``IncludePrefetch`` which
+is shared with all of the nested readers. All of the files are read through this object, 
+which overrides the ``mapped`` setting.
+
+An included file may have been loaded before, by another ``@@i`` command
+or while loading another web with the same reader. The ``registry`` has
+the chunks for the included files which have been loaded. If the file, and all the files it includes,
+are unchanged, a fresh copy of the chunks is used. Only a file which was parsed, or taken from the cache,
+is put in the registry; a copy from the registry is already there.
+
+A file taken from the registry, or the cache, isn't read. If it was read ahead by the ``IncludePrefetch``,
+the text is discarded.
+
+When there's a ``cache``, a file, without an explicit ``source``, may not need to be parsed.
+If the file, and all the files it includes, are unchanged, the chunks are taken from the cache.
+Otherwise, the file is parsed, and the chunks saved in the cache. 
+The file's fingerprint is taken before it's read, so a file changed while it's being
+parsed will be parsed again the next time. Files with errors aren't cached: the error messages
+will be produced every time. Files with a missing, but permitted, ``@@i`` file aren't cached, either.
+Nor are files with an ``@@(expression@@)``, or files which include them: the value of an expression 
+can change from one run to the next.
+
 @d Imports
 @{from typing import TextIO, cast
 @}
@@ -2395,22 +3774,81 @@ def load(self, filepath: Path, source: TextIO | None = None) -> list[Chunk]:
     """Returns a flat list of chunks to be made into a Web. 
     Also used to expand ``@@i`` included files.
     """
+    if self.jobs and self.prefetch is None:
+        with IncludePrefetch(self.command, self.jobs) as self.prefetch:
+            try:
+                return self.load(filepath, source)
+            finally:
+                self.prefetch = None
+            
     self.filePath = filepath
     self.base_path = self.filePath.parent
 
     if source:
+        self.read(source)
+    else:
+        self.load_file()
+    return self.content
+
+def read(self, source: TextIO | None = None) -> None:
+    """Tokenizes and parses the file, or the given source."""
+    if self.prefetch:
+        self._source = self.prefetch.source(self.filePath, source)
+        self.parse_source()
+    elif source:
         self._source = source
         self.parse_source()
+    elif self.mapped and self.filePath.stat().st_size:
+        with self.filePath.open("rb") as binary, mmap.mmap(binary.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            self.parse_source(MappedTokenizer(buffer, self.command, name=str(self.filePath)))
     else:
         with self.filePath.open() as self._source:
             self.parse_source()
-    return self.content
-
-def parse_source(self) -> None:
-    """Builds a sequence of Chunks."""
-    self.tokenizer = Tokenizer(self._source, self.command)
+            
+def load_file(self) -> None:
+    """Uses the chunks from the registry, for an included file, or the cache,
+    if this file and its includes are unchanged.
+    Otherwise, parses the file and saves the chunks.
+    """
+    registered = parsed = self.registry.get(self.filePath, self.command) if self.parent else None
+    if parsed:
+        self.logger.debug("Using registered %s", self.filePath)
+    elif self.cache and (parsed := self.cache.get(self.filePath, self.command)):
+        self.logger.debug("Using cached %s", self.filePath)
+    if parsed:
+        if self.prefetch:
+            self.prefetch.discard(self.filePath)
+        self.content = parsed.content
+        self.fileLines = parsed.fileLines
+        self.totalFiles += parsed.totalFiles
+        self.totalLines += parsed.totalLines
+        self.dependencies = parsed.dependencies
+    else:
+        self.dependencies = [(self.cache or self.registry).fingerprint(self.filePath)]
+        totalFiles, totalLines, errors, expressions = self.totalFiles, self.totalLines, self.errors, self.expressions
+        self.read()
+        if self.errors != errors or self.expressions != expressions or any(size < 0 for _, size, _, _ in self.dependencies):
+            return
+        parsed = ParsedFile(
+            dependencies=self.dependencies, 
+            content=self.content, 
+            fileLines=self.fileLines, 
+            totalFiles=self.totalFiles - totalFiles, 
+            totalLines=self.totalLines - totalLines
+        )
+        if self.cache:
+            self.cache.put(self.filePath, self.command, parsed)
+    if self.parent and not registered:
+        self.registry.put(self.filePath, self.command, parsed)
+
+def parse_source(self, tokenizer: Tokenizer | None = None) -> None:
+    """Builds a sequence of Chunks from the tokenizer, default is a ``Tokenizer`` for ``self._source``."""
+    self.tokenizer = tokenizer or Tokenizer(self._source, self.command, name=str(self.filePath))
     self.totalFiles += 1
 
+    # Globals for @@(expression@@), built when needed.
+    self.expression_globals: dict[str, Any] | None = None
+
     # Initial anonymous chunk.
     self.content = [Chunk()]
 
@@ -2420,15 +3858,16 @@ def parse_source(self) -> None:
                 continue
             else:
                 self.logger.error('Unknown @@-command in input: %r near %r', token, self.location())
-                self.content[-1].add_text(token, self.location())
+                self.content[-1].add_text(token, self.position())
                 
         elif token:
             # Accumulate a non-empty block of text in the current chunk.
-            self.content[-1].add_text(token, self.location())
+            self.content[-1].add_text(token, self.position())
 
         else:
             # Whitespace
             pass
+    self.fileLines = self.tokenizer.lineNumber
     self.logger.debug("parse_source: [")
     for c in self.content:
         self.logger.debug("  %r", c)
@@ -2483,8 +3922,8 @@ into a stream of tokens. There are two broad classes of tokens:
 
 -   The remaining text; neither newlines nor commands.
 
-The tokenizer works by reading the entire file and splitting on ``r'@@.'`` patterns.
-The ``re.split()`` function will separate the input
+The tokenizer works by splitting the input on ``r'@@.'`` patterns.
+The effect is the same as the ``re.split()`` function, which will separate the input
 and preserve the actual character sequence on which the input was split.
 This breaks the input into blocks of text separated by the ``r'@@.'`` characters.
 
@@ -2501,7 +3940,19 @@ We can then assemble each ``Command`` instance from a short sequence of tokens.
 The core ``TextCommand`` and ``CodeCommand`` will be a line of text ending with
 the ``\n``. 
 
-The tokenizer counts newline characters for us, so that error messages can include
+A generated WEB file can be very large. Reading the entire file
+and splitting it would hold the text several times over: the string, the list of pieces, 
+and the tokens built from it. Instead, the input is read in blocks of ``block_size`` characters,
+and ``finditer()`` locates the commands and newlines in each block.
+
+There's a wrinkle at the end of each block. The text after the last match
+may continue into the next block. It may also end with a command character, and the 
+``@@``\ *x* command is split between the two blocks. 
+This trailing text is held back and prefixed to the next block. 
+The tokens are the same as splitting the whole input,
+but the memory used is bounded by the block size and the longest line of text.
+
+The tokenizer tracks the offset of each token and the offsets where lines start, so that error messages can include
 a line number. Also, we can tangle extract comments into a file to reveal source line numbers.
 
 Since the tokenizer is a proper iterator, we can use ``tokens = iter(Tokenizer(source))``
@@ -2517,22 +3968,137 @@ from collections.abc import Iterator, Iterable
 @d Tokenizer class...
 @{
 class Tokenizer(Iterator[str]):
-    def __init__(self, stream: TextIO, command_char: str='@@') -> None:
+    block_size = 64 * 1024  #: Characters read from the input at a time.
+    
+    def __init__(self, stream: TextIO, command_char: str='@@', block_size: int | None = None, name: str = "") -> None:
         self.command = command_char
         self.parsePat = re.compile(f'({self.command}.|\\n)')
-        self.token_iter = (t for t in self.parsePat.split(stream.read()) if len(t) != 0)
-        self.lineNumber = 0
+        if block_size:
+            self.block_size = block_size
+        self.index = LineIndex(name)
+        self.offset = 0  #: The offset of the end of the most recent token.
+        self.token_iter = self.split(stream)
+        
+    def split(self, stream: TextIO) -> Iterator[str]:
+        """Yields the non-empty text, ``@@x``, and newline tokens from each block of input.
+        Text after the last match is held back to be continued by the next block.
+        Each newline adds the offset of the following line to the index.
+        """
+        pending = ""
+        base = 0  # The offset of the start of the buffer.
+        line_starts = self.index.line_starts
+        while block := stream.read(self.block_size):
+            buffer = pending + block
+            start = 0
+            for match in self.parsePat.finditer(buffer):
+                if match.start() != start:
+                    self.offset = base + match.start()
+                    yield buffer[start:match.start()]
+                start = match.end()
+                self.offset = base + start
+                token = match.group()
+                if token == '\n':
+                    line_starts.append(self.offset)
+                yield token
+            base += start
+            pending = buffer[start:]
+        if pending:
+            self.offset = base + len(pending)
+            yield pending
+        
+    @@property
+    def lineNumber(self) -> int:
+        """The number of newlines consumed so far."""
+        return len(self.index.line_starts) - 1
         
     def __next__(self) -> str:
-        token = next(self.token_iter)
-        self.lineNumber += token.count('\n')
-        return token
+        return next(self.token_iter)
         
     def __iter__(self) -> Iterator[str]:
         return self
 @| Tokenizer
 @}
 
+The ``LineIndex`` is the list of offsets where each line of the input starts.
+The tokenizer appends to this list as it encounters newlines. 
+A line number is computed only when it's needed, using a binary search 
+of this list. Each ``Command`` keeps a reference to the shared index
+and an integer offset.
+
+@d Imports
+@{import bisect
+@}
+
+The ``MappedTokenizer`` is a ``Tokenizer`` for a memory-mapped file. 
+The regular expression works directly with the bytes of the file.
+Each token is decoded, as UTF-8, when it's yielded. The offsets in the ``LineIndex``
+are byte offsets, which works because the index is only used for this file.
+
+There are two subtleties in matching bytes.
+
+-   A command character might be followed by a multi-byte character. 
+    The pattern matches the whole character so it's never split into invalid pieces.
+
+-   A file read as text has its newlines translated, so ``\r\n`` and ``\r`` both become ``\n``.
+    The pattern does this translation for the mapped file.
+
+@d Imports
+@{import mmap
+@}
+
+@d Tokenizer class...
+@{
+class MappedTokenizer(Tokenizer):
+    """Tokenizes a memory-mapped file, decoding each token as it's yielded."""
+    def __init__(self, buffer: mmap.mmap, command_char: str='@@', name: str = "", encoding: str = "utf-8") -> None:
+        self.command = command_char
+        self.encoding = encoding
+        self.bytePat = re.compile(command_char.encode(encoding) + rb'(?:[^\r\n\x80-\xff]|[\xc0-\xff][\x80-\xbf]*)|\r\n?|\n')
+        self.index = LineIndex(name)
+        self.offset = 0
+        self.token_iter = self.split_buffer(buffer)
+        
+    def split_buffer(self, buffer: mmap.mmap) -> Iterator[str]:
+        """Yields the non-empty text, ``@@x``, and newline tokens from the mapped file."""
+        line_starts = self.index.line_starts
+        start = 0
+        for match in self.bytePat.finditer(buffer):
+            if match.start() != start:
+                self.offset = match.start()
+                yield buffer[start:match.start()].decode(self.encoding)
+            start = self.offset = match.end()
+            token = match.group()
+            if token.endswith((b'\n', b'\r')):
+                line_starts.append(start)
+                yield '\n'
+            else:
+                yield token.decode(self.encoding)
+        if start != len(buffer):
+            self.offset = len(buffer)
+            yield buffer[start:].decode(self.encoding)
+@| MappedTokenizer
+@}
+
+@d Tokenizer class...
+@{
+class LineIndex:
+    """Line start offsets for one input file."""
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.line_starts = [0]
+        
+    def line(self, offset: int) -> int:
+        """The line number, starting from 1, which contains the offset."""
+        return bisect.bisect_right(self.line_starts, offset)
+        
+    def location(self, offset: int) -> tuple[str, int]:
+        return (self.name, self.line(offset))
+        
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name!r})"
+@| LineIndex
+@}
+
 Other Application Components
 ----------------------------
 
@@ -2958,6 +4524,15 @@ exceptions due to incorrect inputs.
 
 2.  The ``Web`` class ``createUsedBy()`` method can raise an exception when a 
     chunk reference cannot be resolved to a named chunk.
+    
+3.  The ``Web`` class ``reference_graph`` can have cycles: chunks which refer to themselves,
+    directly or indirectly. These can't be tangled. Each cycle is reported with a warning. 
+    The web can still be woven, which never expands a reference; the ``Tangler`` raises an exception.
+
+When the optional ``compiled`` option is set, a compiled web, a ``.wc`` file in the output directory, 
+is used if it's newer than the source files. If it's not usable, the source is loaded, 
+and a new ``.wc`` file is saved. A web with a missing, but permitted, ``@@i`` file isn't saved.
+Nor is a web with an ``@@(expression@@)``, since the value can change from one run to the next.
 
 @d LoadAction call... @{
 def __call__(self, options: argparse.Namespace) -> None:
@@ -2967,6 +4542,14 @@ def __call__(self, options: argparse.Namespace) -> None:
     self.webReader.permitList = self.options.permitList
     self.logger.debug("Reader Class %s", self.webReader.__class__.__name__)
 
+    compiled = getattr(self.options, "compiled", False)
+    if compiled:
+        compiled_path = self.options.output / self.options.source_path.with_suffix(".wc").name
+        if web := Web.load_compiled(compiled_path, self.options.command, self.options.source_path):
+            self.logger.info("Using compiled web %s", compiled_path)
+            self.options.web = web
+            return
+
     error = f"Problems with source file {self.options.source_path!r}, no output produced."
     try:
         chunks = self.webReader.load(self.options.source_path)
@@ -2979,6 +4562,11 @@ def __call__(self, options: argparse.Namespace) -> None:
         self.logger.debug("Web defines  %3d files", len(self.options.web.files))
         self.logger.debug("Web defines  %3d macros", len(self.options.web.macros))
         self.logger.debug("Web defines  %3d names", len(self.options.web.userids))
+        for component in self.options.web.reference_graph.cycles:
+            self.logger.warning("Reference cycle among %s", self.options.web.reference_graph.describe(component))
+        if compiled and not self.webReader.expressions and all(size >= 0 for _, size, _, _ in self.webReader.dependencies):
+            sources = [Path(name) for name, _, _, _ in self.webReader.dependencies]
+            self.options.web.save_compiled(compiled_path, self.options.command, sources)
     except Error as e:
         self.logger.error(error)
         raise  # Could not be parsed or built.
@@ -3124,6 +4712,19 @@ namespace returned by ``parseArgs()``.
     is set to a ``TanglerMake`` instance 
     to create the output files.
 
+:jobs:
+    the number of threads used to read included files and to tangle the output files.
+    Zero does these in order.
+
+:manifest:
+    the path to a manifest of the fingerprints of the tangled files, or ``None``.
+
+:only:
+    a list of glob patterns for the names of the ``@@o`` files to tangle, or ``None`` to tangle all of them.
+
+:fsync:
+    sync the tangled files to storage, in one batch.
+
 :theWeaver:
     is set to an instance of a subclass of ``Weaver`` based on ``weaver``
 
@@ -3138,6 +4739,12 @@ self.defaults = argparse.Namespace(
     reference='s',  # Simple references
     tangler_line_numbers=False,
     output=Path.cwd(),
+    cache=None,  # Parse every file
+    compiled=False,  # Don't use a .wc file
+    jobs=0,  # Read and tangle files in order
+    manifest=None,  # Compare every output file
+    only=None,  # Tangle every output file
+    fsync=False,  # Let the OS write the files
     )
 
 # Primitive Actions
@@ -3172,6 +4779,12 @@ def parseArgs(self, argv: list[str]) -> argparse.Namespace:
     p.add_argument("-p", "--permit", dest="permit", action="store")
     p.add_argument("-n", "--linenumbers", dest="tangler_line_numbers", action="store_true")
     p.add_argument("-o", "--output", dest="output", action="store", type=Path)
+    p.add_argument("--cache", dest="cache", action="store", type=Path)
+    p.add_argument("--compiled", dest="compiled", action="store_true")
+    p.add_argument("-j", "--jobs", dest="jobs", action="store", type=int)
+    p.add_argument("--manifest", dest="manifest", action="store", type=Path)
+    p.add_argument("--only", dest="only", action="append", metavar="PATTERN")
+    p.add_argument("--fsync", dest="fsync", action="store_true")
     p.add_argument("-V", "--Version", action='version', version=f"py-web-lp pyweb.py {__version__}")
     p.add_argument("files", nargs='+', type=Path)
     config = p.parse_args(argv, namespace=self.defaults)
@@ -3185,6 +4798,11 @@ def expand(self, config: argparse.Namespace) -> argparse.Namespace:
     # Weaver & Tangler
     config.theWeaver = Weaver(config.output)
     config.theTangler = TanglerMake(config.output)
+    config.theTangler.jobs = config.jobs
+    config.theTangler.only = config.only or []
+    config.theTangler.fsync = config.fsync
+    if config.manifest:
+        config.theTangler.manifest = OutputManifest(config.manifest)
     
     if config.permit:
         # save permitted errors, usual case is ``-pi`` to permit ``@@i`` include errors
@@ -3193,6 +4811,9 @@ def expand(self, config: argparse.Namespace) -> argparse.Namespace:
         config.permitList = []
 
     config.webReader = WebReader()
+    config.webReader.jobs = config.jobs
+    if config.cache:
+        config.webReader.cache = ParseCache(config.cache)
 
     return config
 @| parseArgs expand
@@ -156,6 +156,40 @@ Currently, the following command line options are accepted.
 :-o *directory*:
     The directory to which to write output files.
 
+:--cache *directory*:
+    Save the chunks parsed from each file in the given directory.
+    Files that haven't changed, and don't include changed files, are not parsed again.
+    A file with an ``@@(expression@@)``, or one that includes such a file, is parsed every time,
+    so the expression is evaluated again.
+
+:--compiled:
+    Save the parsed web as a ``.wc`` file in the output directory.
+    When the ``.wc`` file is newer than the source files, it's used instead of parsing the source.
+    A web with an ``@@(expression@@)`` isn't saved.
+
+:-j *n*, --jobs *n*:
+    Use *n* threads to read included files ahead of the parser, and to tangle the ``@@o`` files
+    concurrently. The output files, and the summary, are the same as processing the files one at a time:
+    each output file is tangled starting from no indentation, whatever the files before it.
+
+:--manifest *file*:
+    Save the size, modification time, and hash of each tangled file in the given file.
+    An output file that has the same hash, and hasn't been touched since the previous run, isn't read or written.
+    Without a manifest, each output file is read and compared with the tangled text.
+    
+    The manifest also records the chunks expanded into each file, with a hash of each chunk.
+    An output file tangled from the same chunks as the previous run isn't tangled at all.
+    Only the files which expand a changed chunk are tangled again.
+
+:--only *pattern*:
+    Tangle only the ``@@o`` files with names that match the glob pattern, for example ``--only 'src/*.py'``.
+    This can be repeated; a file matching any of the patterns is tangled. 
+    The other files aren't touched, and the chunks only they need aren't expanded.
+
+:--fsync:
+    Sync the tangled files, and their directories, to storage after all of the files are tangled.
+    Each file is always written to a temporary file next to it, which atomically replaces it.
+
 Bootstrapping
 --------------
 
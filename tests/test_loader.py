@@ -2,6 +2,7 @@
 import logging.handlers
 from pathlib import Path
 from textwrap import dedent
+import time
 from typing import ClassVar
 
 """Loader and parsing tests."""
@@ -13,6 +14,7 @@ import string
 import sys
 import types
 import unittest
+from unittest.mock import patch
 
 import pyweb
 
@@ -88,12 +90,191 @@ class Test_IncludeParseErrors(ParseTestcase):
                 "ERROR:WebReader:Errors in included file 'test8_inc.tmp', output is incomplete."
             ]
         ) 
+    def test_mapped_error_should_count_2(self) -> None:
+        self.rdr.mapped = True
+        with self.assertLogs('WebReader', level='WARN') as log_capture:
+            chunks = self.rdr.load(self.file_path, self.source)
+        self.assertEqual(1, self.rdr.errors)
+        self.assertEqual(log_capture.output,
+            [
+                "ERROR:WebReader:At ('test8_inc.tmp', 4): end of input, {'@{', '@['} not found", 
+                "ERROR:WebReader:Errors in included file 'test8_inc.tmp', output is incomplete."
+            ]
+        ) 
+    def test_prefetch_error_should_count_2(self) -> None:
+        self.rdr.jobs = 2
+        with self.assertLogs('WebReader', level='WARN') as log_capture:
+            chunks = self.rdr.load(self.file_path, self.source)
+        self.assertEqual(1, self.rdr.errors)
+        self.assertEqual(2, self.rdr.totalFiles)
+        self.assertEqual(log_capture.output,
+            [
+                "ERROR:WebReader:At ('test8_inc.tmp', 4): end of input, {'@{', '@['} not found", 
+                "ERROR:WebReader:Errors in included file 'test8_inc.tmp', output is incomplete."
+            ]
+        ) 
+        self.assertIsNone(self.rdr.prefetch)
     def tearDown(self) -> None:
         super().tearDown()
         Path('test8_inc.tmp').unlink()
 
 
 
+class Test_ParseCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache_path = Path("test_cache.tmp")
+        self.file_path = Path("test9.w")
+        self.file_path.write_text(test8_w)
+        Path('test8_inc.tmp').write_text("A chunk from test8_inc.tmp\n@d yap @{yap@}\n")
+        
+    def load(self) -> tuple[pyweb.WebReader, list[pyweb.Chunk]]:
+        rdr = pyweb.WebReader()
+        rdr.cache = pyweb.ParseCache(self.cache_path)
+        return rdr, rdr.load(self.file_path)
+        
+    def test_should_use_cache(self) -> None:
+        rdr_1, chunks_1 = self.load()
+        self.assertTrue(hasattr(rdr_1, "tokenizer"))
+        rdr_2, chunks_2 = self.load()
+        self.assertFalse(hasattr(rdr_2, "tokenizer"))
+        self.assertEqual(repr(chunks_1), repr(chunks_2))
+        self.assertEqual((rdr_1.totalFiles, rdr_1.totalLines), (rdr_2.totalFiles, rdr_2.totalLines))
+        web = pyweb.Web(chunks_2)
+        self.assertEqual(["title", "yap"], [m.name for m in web.macros])
+        
+    def test_should_detect_changed_include(self) -> None:
+        rdr_1, chunks_1 = self.load()
+        Path('test8_inc.tmp').write_text("A chunk from test8_inc.tmp\n@d yip @{yip@}\n")
+        rdr_2, chunks_2 = self.load()
+        self.assertTrue(hasattr(rdr_2, "tokenizer"))
+        web = pyweb.Web(chunks_2)
+        self.assertEqual(["title", "yip"], [m.name for m in web.macros])
+        
+    def test_should_not_cache_expressions(self) -> None:
+        Path('test8_inc.tmp').write_text("Built at @(time.perf_counter_ns()@)\n@d yap @{yap@}\n")
+        rdr_1, chunks_1 = self.load()
+        rdr_2, chunks_2 = self.load()
+        self.assertEqual(1, rdr_2.expressions)
+        self.assertTrue(hasattr(rdr_2, "tokenizer"))
+        self.assertEqual([], list(self.cache_path.glob("*.pickle")))
+        self.assertNotEqual(repr(chunks_1), repr(chunks_2))
+        
+    def tearDown(self) -> None:
+        if self.cache_path.exists():
+            for path in self.cache_path.glob("*"):
+                path.unlink()
+            self.cache_path.rmdir()
+        self.file_path.unlink()
+        Path('test8_inc.tmp').unlink()
+
+
+
+class Test_IncludeRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rdr = pyweb.WebReader()
+        Path('test10_inc.tmp').write_text("@d yap @{yap@}\n")
+        Path('test10_cycle.tmp').write_text("Before\n@i test10_cycle.tmp\nAfter\n")
+        
+    def test_should_parse_once(self) -> None:
+        source = io.StringIO("@i test10_inc.tmp\n@i test10_inc.tmp\n")
+        chunks = self.rdr.load(Path("test10.w"), source)
+        self.assertEqual(0, self.rdr.errors)
+        self.assertEqual(3, self.rdr.totalFiles)
+        self.assertEqual(1, len(self.rdr.registry.parsed))
+        first, second = [c for c in chunks if c.name == "yap"]
+        self.assertIsNot(first, second)
+        self.assertEqual(repr(first), repr(second))
+        
+    def test_should_register_once(self) -> None:
+        self.rdr.jobs = 2
+        pending: list[set[Path]] = []
+        discard = pyweb.IncludePrefetch.discard
+        def discard_spy(prefetch: pyweb.IncludePrefetch, path: Path) -> None:
+            discard(prefetch, path)
+            pending.append(set(prefetch.pending))
+        with (
+            patch.object(self.rdr.registry, "put", wraps=self.rdr.registry.put) as put,
+            patch.object(pyweb.IncludePrefetch, "discard", discard_spy),
+        ):
+            self.rdr.load(Path("test10.w"), io.StringIO("@i test10_inc.tmp\n"))
+            self.rdr.load(Path("test10.w"), io.StringIO("@i test10_inc.tmp\n"))
+        self.assertEqual(1, put.call_count)
+        # The second load read the included file ahead, but used the registry.
+        self.assertEqual([set()], pending)
+        
+    def test_should_detect_cycle(self) -> None:
+        source = io.StringIO("@i test10_cycle.tmp\n")
+        with self.assertLogs('WebReader', level='WARN') as log_capture:
+            chunks = self.rdr.load(Path("test10.w"), source)
+        self.assertEqual(1, self.rdr.errors)
+        self.assertEqual(log_capture.output,
+            [
+                "ERROR:WebReader:Include cycle 'test10_cycle.tmp' -> 'test10_cycle.tmp', output is incomplete.", 
+                "ERROR:WebReader:Errors in included file 'test10_cycle.tmp', output is incomplete."
+            ]
+        ) 
+        
+    def tearDown(self) -> None:
+        Path('test10_inc.tmp').unlink()
+        Path('test10_cycle.tmp').unlink()
+
+
+
+class Test_CompiledWeb(unittest.TestCase):
+    def setUp(self) -> None:
+        self.file_path = Path("test11.w")
+        self.file_path.write_text(test8_w)
+        self.include_path = Path('test8_inc.tmp')
+        self.include_path.write_text("A chunk from test8_inc.tmp\n@d yap @{yap@<title@>@}\n")
+        self.compiled_path = Path("test11.wc")
+        rdr = pyweb.WebReader()
+        self.web = pyweb.Web(rdr.load(self.file_path))
+        self.web.web_path = self.file_path
+        self.sources = [Path(name) for name, _, _, _ in rdr.dependencies]
+        
+    def test_should_load_compiled(self) -> None:
+        self.assertEqual([self.file_path, self.include_path], self.sources)
+        self.web.save_compiled(self.compiled_path, "@", self.sources)
+        web = pyweb.Web.load_compiled(self.compiled_path, "@", self.file_path)
+        assert web is not None
+        self.assertEqual(repr(self.web), repr(web))
+        self.assertEqual(self.web.chunk_map.keys(), web.chunk_map.keys())
+        self.assertEqual(1, web.resolve_chunk("title")[0].references)
+        self.assertIs(web, web.chunks[0].web())
+        self.assertEqual(self.file_path, web.web_path)
+        
+    def test_should_reject_stale(self) -> None:
+        self.web.save_compiled(self.compiled_path, "@", self.sources)
+        future = time.time() + 10
+        os.utime(self.include_path, (future, future))
+        self.assertIsNone(pyweb.Web.load_compiled(self.compiled_path, "@", self.file_path))
+        
+    def test_should_reject_version(self) -> None:
+        self.web.save_compiled(self.compiled_path, "@", self.sources)
+        self.assertIsNone(pyweb.Web.load_compiled(self.compiled_path, "$", self.file_path))
+        try:
+            pyweb.Web.wc_version += 1
+            self.assertIsNone(pyweb.Web.load_compiled(self.compiled_path, "@", self.file_path))
+        finally:
+            pyweb.Web.wc_version -= 1
+            
+    def test_should_reject_other_source(self) -> None:
+        other_path = Path("test11_other") / self.file_path.name
+        other_path.parent.mkdir(exist_ok=True)
+        other_path.write_text(test8_w)
+        self.addCleanup(other_path.parent.rmdir)
+        self.addCleanup(other_path.unlink)
+        self.web.save_compiled(self.compiled_path, "@", self.sources)
+        self.assertIsNotNone(pyweb.Web.load_compiled(self.compiled_path, "@", self.file_path.resolve()))
+        self.assertIsNone(pyweb.Web.load_compiled(self.compiled_path, "@", other_path))
+        
+    def tearDown(self) -> None:
+        self.file_path.unlink()
+        self.include_path.unlink()
+        self.compiled_path.unlink(missing_ok=True)
+
+
+
 if __name__ == "__main__":
     logging.basicConfig(stream=sys.stdout, level=logging.WARN)
     unittest.main()
@@ -282,13 +282,24 @@ def mock_web() -> pyweb.Web:
         name="mock web",
         web_path=Path("TestWeaver.w"),
         chunks=[c_0, c_1, c_2],
+        reference_graph=Mock(cycles=[]),
     )
     web.chunks[1].name="sample.out"
     web.chunks[2].name="named..."
     web.files = [web.chunks[1]]
     return web
+
+def code(text: str) -> pyweb.Command:
+    return pyweb.CodeCommand(text, ("sample.w", 1))
+
+def ref(name: str) -> pyweb.Command:
+    return pyweb.ReferenceCommand(name, ("sample.w", 1))
 @}
 
+Tests that need a real ``Web`` build it from actual ``Chunk`` instances.
+The ``code()`` and ``ref()`` functions create the ``Command`` instances
+for these chunks.
+
 The default Weaver is an Emitter that uses templates to produce RST markup.
 
 @d Unit Test of Weaver... @{
@@ -480,6 +491,38 @@ class TestTangler(unittest.TestCase):
         output = target.getvalue()
         self.assertEqual("Some Code\n", output)
         
+    def test_tangler_should_codeBlock_indented(self) -> None:
+        target = io.StringIO()
+        self.tangler.addIndent(4)
+        self.tangler.codeBlock(target, "first\n\nlast  ")
+        self.assertEqual("    first\n    \n    last  ", target.getvalue())
+        self.assertEqual(2, self.tangler.linesWritten)
+        self.assertEqual("      ", self.tangler.fragment)
+        self.tangler.codeBlock(target, "\n")
+        self.assertEqual("      ", self.tangler.fragment)
+        self.assertEqual(3, self.tangler.linesWritten)
+        
+    def test_tangler_should_reuse_expansions(self) -> None:
+        web = pyweb.Web([
+            pyweb.OutputChunk("sample.out", commands=[
+                ref("header"), code("\ndef f():\n    "), ref("header"), code("\n    x = ("), ref("header"), code(")\n"),
+            ]),
+            pyweb.NamedChunk("header", commands=[code("# one\n"), ref("inner"), code("\n# two")]),
+            pyweb.NamedChunk("inner", commands=[code("if a:\n    "), ref("leaf"), code("\n")]),
+            pyweb.NamedChunk("leaf", commands=[code("pass")]),
+        ])
+        self.tangler.emit(web)
+        # The same output as expanding each reference.
+        expected = (
+            "# one\nif a:\n        pass\n\n# two\n"
+            "def f():\n        # one\n    if a:\n                pass    \n    \n    # two\n"
+            "    x = (         # one\n         if a:\n                          pass         \n         \n         # two)\n"
+        )
+        self.assertEqual(expected, (self.filepath / "sample.out").read_text())
+        self.assertEqual(["header"], list(self.tangler.expansions))
+        self.assertEqual(16, self.tangler.linesWritten)
+        self.assertEqual([], self.tangler.blocks)
+        
     def test_tangler_should_indent(self) -> None:
         target = io.StringIO()
         self.tangler.codeBlock(target, "Begin\n")
@@ -502,6 +545,120 @@ class TestTangler(unittest.TestCase):
         self.tangler.codeBlock(target, "\n")
         output = target.getvalue()
         self.assertEqual("Begin\nMore Code\nEnd\n", output)
+        
+    def test_tangler_should_expand_deep_references(self) -> None:
+        depth = 5 * sys.getrecursionlimit()
+        chunks: list[pyweb.Chunk] = [
+            pyweb.OutputChunk("sample.out", commands=[pyweb.ReferenceCommand("c0", ("sample.w", 1))])
+        ]
+        for i in range(depth):
+            chunks.append(
+                pyweb.NamedChunk(f"c{i}", commands=[
+                    pyweb.CodeCommand(f"# {i}\n ", ("sample.w", i)), 
+                    pyweb.ReferenceCommand(f"c{i+1}", ("sample.w", i)), 
+                    pyweb.CodeCommand("\n", ("sample.w", i)),
+                ])
+            )
+        chunks.append(pyweb.NamedChunk(f"c{depth}", commands=[pyweb.CodeCommand("end\n", ("sample.w", depth))]))
+        self.tangler.emit(pyweb.Web(chunks))
+        lines = (self.filepath / "sample.out").read_text().splitlines()
+        self.assertEqual(2*depth + 1, len(lines))
+        self.assertEqual("  # 1", lines[1])
+        self.assertEqual(2*depth*" " + "end", lines[depth])
+        self.assertEqual([0], self.tangler.context)
+        self.assertEqual([], self.tangler.pending)
+        
+    def test_tangler_should_reject_cycles(self) -> None:
+        web = pyweb.Web([
+            pyweb.OutputChunk("sample.out", commands=[pyweb.ReferenceCommand("loop", ("sample.w", 1))]),
+            pyweb.NamedChunk("loop", commands=[
+                pyweb.CodeCommand("again\n", ("sample.w", 2)), pyweb.ReferenceCommand("loop", ("sample.w", 2))
+            ]),
+        ])
+        with self.assertLogs("Tangler", logging.ERROR) as log:
+            with self.assertRaises(pyweb.Error):
+                self.tangler.emit(web)
+        self.assertEqual(["ERROR:Tangler:Reference cycle among 'loop' (2)"], log.output)
+        self.assertFalse((self.filepath / "sample.out").exists())
+        
+    def test_tangler_should_recover_from_errors(self) -> None:
+        def web(missing: str) -> pyweb.Web:
+            return pyweb.Web([
+                pyweb.OutputChunk("sample.out", commands=[ref("shared"), code("\n  "), ref("shared")]),
+                pyweb.NamedChunk("shared", commands=[code("a\n  "), ref(missing), code("\n")]),
+                pyweb.NamedChunk("leaf", commands=[code("b")]),
+            ])
+        pyweb.Tangler(self.filepath).emit(web("leaf"))
+        expected = (self.filepath / "sample.out").read_text()
+        with self.assertLogs("ReferenceCommand", logging.ERROR):
+            with self.assertRaises(pyweb.Error):
+                self.tangler.emit(web("missing"))
+        self.assertTrue(self.tangler.pending)
+        self.tangler.emit(web("leaf"))
+        self.assertEqual(expected, (self.filepath / "sample.out").read_text())
+        self.assertEqual(([], 0, []), (self.tangler.pending, self.tangler.recording, self.tangler.blocks))
+        
+    def test_tangler_should_emit_concurrently(self) -> None:
+        names = [f"sample_{i}.out" for i in range(4)]
+        web = pyweb.Web(
+            [pyweb.OutputChunk(name, commands=[code(f"# {name}\n    "), ref("body"), code("\n")]) for name in names]
+            + [pyweb.NamedChunk("body", commands=[code("x = 1\n"), ref("end")])]
+            + [pyweb.NamedChunk("end", commands=[code("y = 2")])]
+        )
+        try:
+            self.tangler.emit(web)
+            expected = [(self.filepath / name).read_text() for name in names]
+            
+            concurrent = pyweb.Tangler(self.filepath)
+            concurrent.jobs = 3
+            concurrent.emit(web)
+            self.assertEqual(expected, [(self.filepath / name).read_text() for name in names])
+            self.assertEqual("# sample_2.out\n        x = 1\n    y = 2\n", expected[2])
+            self.assertEqual(self.tangler.linesWritten, concurrent.linesWritten)
+            self.assertEqual({"body", "end"}, concurrent.reference_names)
+            self.assertEqual([0], concurrent.context)
+        finally:
+            for name in names:
+                (self.filepath / name).unlink(missing_ok=True)
+                
+    def test_tangler_should_reset_for_each_file(self) -> None:
+        names = ["sample_0.out", "sample_1.out"]
+        web = pyweb.Web([
+            # The first file ends without a newline, leaving a fragment.
+            pyweb.OutputChunk(names[0], commands=[code("first\n    ")]),
+            pyweb.OutputChunk(names[1], commands=[pyweb.ReferenceCommand("body", ("sample.w", 2)), code("\n")]),
+            pyweb.NamedChunk("body", commands=[code("a\nb")]),
+        ])
+        try:
+            outputs = []
+            for jobs in (1, 4):
+                tangler = pyweb.Tangler(self.filepath)
+                tangler.jobs = jobs
+                tangler.emit(web)
+                outputs.append([(self.filepath / name).read_text() for name in names])
+            self.assertEqual(outputs[0], outputs[1])
+            self.assertEqual("a\nb\n", outputs[0][1])
+        finally:
+            for name in names:
+                (self.filepath / name).unlink(missing_ok=True)
+                
+    def test_tangler_should_emit_only_selected(self) -> None:
+        web = pyweb.Web([
+            pyweb.OutputChunk(name, commands=[pyweb.CodeCommand(f"{name}\n", ("sample.w", 1))]) 
+            for name in ("sample.out", "sample.py", "other.py")
+        ])
+        self.tangler.only = ["sample.*", "*.txt"]
+        with self.assertLogs("Tangler", logging.WARNING) as log:
+            self.tangler.emit(web)
+        self.assertEqual(["WARNING:Tangler:No output file matches '*.txt'"], log.output)
+        try:
+            self.assertEqual("sample.out\n", (self.filepath / "sample.out").read_text())
+            self.assertEqual("sample.py\n", (self.filepath / "sample.py").read_text())
+            self.assertFalse((self.filepath / "other.py").exists())
+            self.assertEqual(2, self.tangler.linesWritten)
+        finally:
+            (self.filepath / "sample.py").unlink(missing_ok=True)
+            (self.filepath / "other.py").unlink(missing_ok=True)
 @}
 
 A TanglerMake uses a cheap hack to see if anything changed.
@@ -553,6 +710,83 @@ class TestTanglerMake(unittest.TestCase):
         print(self.output.read_text())
         self.assertFalse(os.path.samestat(self.original, self.output.stat()))
         #self.assertNotEqual(self.time_original, self.output.stat().st_mtime)
+        
+    def test_line_endings_should_update(self) -> None:
+        self.output.write_bytes(b"Mocked Tangle Output\r\n")
+        self.tangler.emit(self.web)
+        self.assertEqual(f"Mocked Tangle Output{os.linesep}".encode(), self.output.read_bytes())
+        
+    def test_manifest_should_avoid_reading(self) -> None:
+        manifest_path = self.filepath / "sample.manifest"
+        self.addCleanup(manifest_path.unlink, missing_ok=True)
+        self.tangler.manifest = pyweb.OutputManifest(manifest_path)
+        # The mock web has no reference graph; the chunks aren't recorded.
+        self.tangler.manifest.chunk_digests = Mock(return_value={})  # type: ignore [method-assign]
+        self.tangler.emit(self.web)
+        fingerprint = json.loads(manifest_path.read_text())["outputs"][str(self.output)]
+        self.assertEqual(hashlib.sha256(f"Mocked Tangle Output{os.linesep}".encode()).hexdigest(), fingerprint[3])
+        
+        read_text = Path.read_text
+        def read_other(path: Path) -> str:
+            self.assertNotEqual(self.output, path, "output was read")
+            return read_text(path)
+        with patch.object(Path, "read_text", read_other):
+            self.tangler.emit(self.web)
+        self.assertTrue(os.path.samestat(self.original, self.output.stat()))
+        
+        # A file changed since the manifest was saved is compared and replaced.
+        self.output.write_text("Edited\n")
+        self.tangler.emit(self.web)
+        self.assertEqual("Mocked Tangle Output\n", self.output.read_text())
+        
+    def test_manifest_should_tangle_affected_files(self) -> None:
+        def sample_web(version: str) -> pyweb.Web:
+            return pyweb.Web([
+                pyweb.OutputChunk("sample_a.out", commands=[ref("common"), ref("only a")]),
+                pyweb.OutputChunk("sample_b.out", commands=[ref("common")]),
+                pyweb.NamedChunk("common", commands=[code("common\n")]),
+                pyweb.NamedChunk("only a", commands=[code(f"{version}\n")]),
+            ])
+        manifest_path = self.filepath / "sample.manifest"
+        names = [manifest_path, self.filepath / "sample_a.out", self.filepath / "sample_b.out"]
+        for name in names:
+            self.addCleanup(name.unlink, missing_ok=True)
+        self.tangler.manifest = pyweb.OutputManifest(manifest_path)
+        web = sample_web("one")
+        self.tangler.emit(web)
+        self.assertEqual({"sample_a.out", "common", "only a"}, set(self.tangler.manifest.chunks[str(names[1])]))
+        
+        web = sample_web("two")
+        with self.assertLogs("TanglerMake", logging.INFO) as log:
+            self.tangler.emit(web)
+        self.assertIn(f"INFO:TanglerMake:Unchanged '{names[2]}', not tangled", log.output)
+        self.assertEqual(["sample_a.out"], [line.rpartition("/")[2] for line in log.output if ":Wrote" in line])
+        self.assertEqual("common\ntwo\n", names[1].read_text())
+        
+    def test_replace_should_use_output_directory(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            self.tangler.output = Path(directory) / "nested"
+            self.tangler.fsync = True
+            with patch.object(os, "replace", wraps=os.replace) as replace, patch.object(os, "fsync", wraps=os.fsync) as fsync:
+                self.tangler.emit(self.web)
+            output = self.tangler.output / "sample.out"
+            self.assertEqual("Mocked Tangle Output\n", output.read_text())
+            tempname, target = replace.mock_calls[0].args
+            self.assertEqual(output.parent, Path(tempname).parent)
+            self.assertEqual(output, target)
+            self.assertEqual(2, fsync.call_count)  # The file and its directory.
+            self.assertEqual(["sample.out"], [path.name for path in output.parent.iterdir()])
+            self.assertEqual([], self.tangler.staged)
+            
+    def test_discard_should_remove_staged(self) -> None:
+        file_tangler = self.tangler.file_tangler()
+        assert isinstance(file_tangler, pyweb.TanglerMake)
+        fd, tempname = tempfile.mkstemp(dir=self.filepath, suffix=".tmp")
+        os.close(fd)
+        file_tangler.staged.append((tempname, self.output, "", {}))
+        self.tangler.discard(file_tangler)
+        self.assertFalse(Path(tempname).exists())
+        self.assertEqual([], self.tangler.staged)
 @}
 
 Chunk Tests
@@ -700,6 +934,25 @@ def test_append_command_should_work(self) -> None:
     self.theChunk.commands.append(cmd2)
     self.assertEqual(2, len(self.theChunk.commands))
     self.assertEqual([cmd1, cmd2], self.theChunk.commands)
+    
+def test_add_text_should_accumulate(self) -> None:
+    for line in range(1000):
+        self.theChunk.add_text(f"line {line}", ("sample.w", 1))
+        self.theChunk.add_text("\n", ("sample.w", 1))
+    self.assertEqual(1, len(self.theChunk.commands))
+    self.assertEqual(2000, len(self.theChunk.commands[0].parts))
+    self.assertEqual("line 0\nline 1\n", self.theChunk.commands[0].text[:14])
+    self.assertEqual(1, len(self.theChunk.commands[0].parts))
+    
+def test_slots_should_pickle(self) -> None:
+    self.theChunk.add_text("some text", ("sample.w", 1))
+    self.assertFalse(hasattr(self.theChunk, "__dict__"))
+    self.assertFalse(hasattr(self.theChunk.commands[0], "__dict__"))
+    clone = pickle.loads(pickle.dumps(self.theChunk))
+    self.assertEqual(self.theChunk.name, clone.name)
+    self.assertEqual("some text", clone.commands[0].text)
+    self.assertIs(pyweb.Chunk.logger, clone.logger)
+    self.assertIs(pyweb.TextCommand.logger, clone.commands[0].logger)
 @}
 
 Can we interrogate a Chunk?
@@ -893,6 +1146,88 @@ class TestReferences(unittest.TestCase):
         self.assertEqual(0, len(theList))
 @}
 
+The ``ReferenceGraph`` is built from a ``Web`` of real chunks.
+
+@d Unit Test of Chunk References... @{
+class TestReferenceGraph(unittest.TestCase):
+    def setUp(self) -> None:
+        def chunk(name: str, *refs: str) -> pyweb.Chunk:
+            return pyweb.NamedChunk(name, commands=[pyweb.ReferenceCommand(r, ("sample.w", 1)) for r in refs])
+        self.web = pyweb.Web([
+            pyweb.OutputChunk("out.py", commands=[pyweb.ReferenceCommand("main", ("sample.w", 1))]),
+            chunk("main", "parent", "loop o..."),
+            chunk("parent", "sub"),
+            chunk("sub"),
+            chunk("loop one", "loop two"),
+            chunk("loop two", "loop one", "self"),
+            chunk("self", "self"),
+        ])
+        self.graph = self.web.reference_graph
+
+    def test_adjacency(self) -> None:
+        self.assertEqual({1: [2], 2: [3, 5], 3: [4], 4: [], 5: [6], 6: [5, 7], 7: [7]}, self.graph.adjacency)
+        self.assertEqual([6], self.graph.referrers[7][:1])
+        self.assertIs(self.graph, self.web.reference_graph)
+        
+    def test_order_and_cycles(self) -> None:
+        self.assertEqual([[7], [5, 6]], self.graph.cycles)
+        order = self.graph.order
+        self.assertEqual(list(range(1, 8)), sorted(order))
+        self.assertLess(order.index(1), order.index(2))
+        self.assertLess(order.index(2), order.index(3))
+        self.assertLess(order.index(3), order.index(4))
+        self.assertLess(order.index(6), order.index(7))
+        self.assertEqual("'loop one' (5), 'loop two' (6)", self.graph.describe([5, 6]))
+        
+    def test_ancestors(self) -> None:
+        self.assertEqual({1, 2, 3}, self.graph.ancestors(4))
+        self.assertEqual({1, 2, 5, 6, 7}, self.graph.ancestors(7))
+        self.assertEqual(set(), self.graph.ancestors(1))
+        
+    def test_deep_chain(self) -> None:
+        chunks = [
+            pyweb.NamedChunk(f"c{i}", commands=[pyweb.ReferenceCommand(f"c{i+1}", ("sample.w", i))]) 
+            for i in range(5000)
+        ]
+        chunks.append(pyweb.NamedChunk("c5000"))
+        web = pyweb.Web(chunks)
+        graph = web.reference_graph
+        self.assertEqual([], graph.cycles)
+        self.assertEqual(list(range(1, 5002)), graph.order)
+        self.assertEqual(5000, len(chunks[-1].transitive_referencedBy))
+        self.assertEqual(chunks[:-1], chunks[-1].ancestry_top_down[0])
+        
+    def test_paths(self) -> None:
+        out = pyweb.OutputChunk("out.py", commands=[
+            pyweb.ReferenceCommand("a", ("sample.w", 1)), pyweb.ReferenceCommand("b", ("sample.w", 2))
+        ])
+        a = pyweb.NamedChunk("a", commands=[pyweb.ReferenceCommand("shared", ("sample.w", 3))])
+        b = pyweb.NamedChunk("b", commands=[pyweb.ReferenceCommand("shared", ("sample.w", 4))])
+        shared = pyweb.NamedChunk("shared")
+        web = pyweb.Web([out, a, b, shared])
+        self.assertEqual([[out, a], [out, b]], shared.ancestry_top_down)
+        self.assertEqual([[a, out], [b, out]], shared.ancestry_bottom_up)
+        self.assertEqual([[out]], a.ancestry_top_down)
+        self.assertEqual([], out.ancestry_top_down)
+        self.assertEqual([b, out], shared.transitive_referencedBy)
+        self.assertIs(shared.transitive_referencedBy, shared.transitive_referencedBy)
+        
+    def test_paths_should_be_lazy(self) -> None:
+        # A chain of diamonds: there are 2**n paths to the end of the n-th diamond.
+        chunks: list[pyweb.Chunk] = [pyweb.OutputChunk("out.py", commands=[ref("j0")])]
+        for i in range(40):
+            chunks.append(pyweb.NamedChunk(f"j{i}", commands=[ref(f"l{i}"), ref(f"r{i}")]))
+            chunks.append(pyweb.NamedChunk(f"l{i}", commands=[ref(f"j{i+1}")]))
+            chunks.append(pyweb.NamedChunk(f"r{i}", commands=[ref(f"j{i+1}")]))
+        chunks.append(pyweb.NamedChunk("j40"))
+        web = pyweb.Web(chunks)
+        self.assertEqual(8, len(web.resolve_chunk("j3")[0].ancestry_top_down))
+        self.assertEqual(16, len(web.resolve_chunk("l4")[0].ancestry_bottom_up))
+        graph = web.reference_graph
+        # Only the chunks down to l4 have paths.
+        self.assertEqual(set(range(1, 16)), set(graph.top_down))
+@}
+
 Command Tests
 ---------------
 
@@ -925,6 +1260,12 @@ class TestTextCommand(unittest.TestCase):
     def test_methods_should_work(self) -> None:
         self.assertTrue(self.cmd.typeid.TextCommand)
         self.assertEqual(("sample.w", 314), self.cmd.location)
+        
+    def test_location_should_resolve_offset(self) -> None:
+        index = pyweb.LineIndex("sample.w")
+        index.line_starts.extend([10, 20, 30])
+        cmd = pyweb.TextCommand("text", (index, 25))
+        self.assertEqual(("sample.w", 3), cmd.location)
              
     def test_tangle_should_error(self) -> None:
         tnglr = MockTangler()
@@ -1059,7 +1400,8 @@ class TestReferenceCommand(unittest.TestCase):
         self.referenced_chunk = Mock(seq=sentinel.SEQUENCE, references=1, referencedBy=self.chunk, commands=[Mock()])
         self.web = Mock(
             resolve_name=Mock(return_value=sentinel.FULL_NAME),
-            resolve_chunk=Mock(return_value=[self.referenced_chunk])
+            resolve_chunk=Mock(return_value=[self.referenced_chunk]),
+            generation=0,
         )
         self.cmd.web = Mock(return_value=self.web)
         
@@ -1072,10 +1414,25 @@ class TestReferenceCommand(unittest.TestCase):
     def test_tangle_should_work(self) -> None:
         tnglr = MockTangler()
         self.cmd.tangle(tnglr, sentinel.TARGET)
-        self.web.resolve_chunk.assert_called_once_with("Some Name")
+        self.web.resolve_name.assert_called_once_with("Some Name")
+        self.web.resolve_chunk.assert_called_once_with(sentinel.FULL_NAME)
         tnglr.reference_names.add.assert_called_once_with('Some Name') 
         self.assertEqual(1, self.referenced_chunk.references)
-        self.referenced_chunk.commands[0].tangle.assert_called_once_with(tnglr, sentinel.TARGET)
+        tnglr.addIndent.assert_called_once_with(0)
+        target, commands, key = tnglr.expand.call_args.args
+        self.assertEqual(self.referenced_chunk.commands, list(commands))
+        self.assertIsNone(key)
+        
+    def test_resolution_should_be_saved(self) -> None:
+        self.assertEqual(sentinel.FULL_NAME, self.cmd.full_name)
+        self.assertEqual(sentinel.SEQUENCE, self.cmd.seq)
+        self.assertEqual([self.referenced_chunk], self.cmd.chunk_list)
+        self.web.resolve_name.assert_called_once_with("Some Name")
+        self.web.resolve_chunk.assert_called_once_with(sentinel.FULL_NAME)
+        # A change to the web discards the saved resolution.
+        self.web.generation = 1
+        self.assertEqual(sentinel.FULL_NAME, self.cmd.full_name)
+        self.assertEqual(2, self.web.resolve_name.call_count)
 @}
 
 
@@ -1112,21 +1469,45 @@ class TestWebConstruction(unittest.TestCase):
         self.assertEqual(self.web.resolve_name("c1..."), "c1")
         self.assertEqual(self.web.resolve_name("c3..."), "c3 has a long name")
         
+    def test_abbreviation_index(self) -> None:
+        self.assertEqual(self.web.prefix_matches("c"), ["c2", "c3 has a long name"])
+        self.assertEqual(self.web.prefix_matches("c3"), ["c3 has a long name"])
+        self.assertEqual(self.web.prefix_matches("d"), [])
+        # A name added by a non-strict resolution is found by later abbreviations.
+        self.assertEqual(self.web.resolve_name("c4 is new"), "c4 is new")
+        self.assertEqual(self.web.resolve_name("c4..."), "c4 is new")
+        self.assertEqual(self.web.prefix_matches("c"), ["c2", "c3 has a long name", "c4 is new"])
+        self.assertEqual(self.web.generation, 1)
+        with self.assertRaises(pyweb.Error) as exc_info:
+            self.web.resolve_name("c...")
+        self.assertIn("Ambiguous abbreviation 'c...'", exc_info.exception.args[0])
+        
     def test_chunks_should_iterate(self) -> None:
         self.assertEqual([self.c2], list(self.web.file_iter()))
         self.assertEqual([self.c3], list(self.web.macro_iter()))
-        self.assertEqual([SimpleNamespace(def_name="userid", chunk=self.c3)], list(self.web.userid_iter()))
+        self.assertEqual([pyweb.UserIdDef(def_name="userid", chunk=self.c3)], list(self.web.userid_iter()))
         self.assertEqual([self.c2], self.web.files)
         self.assertEqual(
             [
-                SimpleNamespace(name="c2", full_name="c2", seq=1, def_list=[self.c2]),
-                SimpleNamespace(name="c3 has a long name", full_name="c3 has a long name", seq=2, def_list=[self.c3])
+                pyweb.MacroXref(name="c2", full_name="c2", seq=1, def_list=[self.c2]),
+                pyweb.MacroXref(name="c3 has a long name", full_name="c3 has a long name", seq=2, def_list=[self.c3])
             ], 
             self.web.macros)
-        self.assertEqual([SimpleNamespace(userid='userid', ref_list=[self.c3])], self.web.userids)
+        self.assertEqual([pyweb.UserIdXref(userid='userid', ref_list=[self.c3])], self.web.userids)
         self.assertEqual([self.c2], self.web.no_reference())
         self.assertEqual([], self.web.multi_reference())
         
+    def test_xref_tables_should_be_cached(self) -> None:
+        macros = self.web.macros
+        self.assertIs(macros, self.web.macros)
+        self.assertIs(self.web.files, self.web.files)
+        self.assertIs(self.web.userids, self.web.userids)
+        self.web.invalidate()
+        self.assertIsNot(macros, self.web.macros)
+        macros = self.web.macros
+        self.web.chunks.append(self.c1)
+        self.assertIsNot(macros, self.web.macros)
+        
     def test_valid_web_should_tangle(self) -> None:
         """This is the entire interface used by tangling.
         The details are pushed down to ```command.tangle()`` for each command in each chunk.
@@ -1173,6 +1554,37 @@ class TestTokenizer(unittest.TestCase):
         '@@>', '\n', '@@]', ' ', '@@}', ' ', '@@i', ' ', '@@|', ' ', '@@m', ' ', 
         '@@f', ' ', '@@u', ' ', '@@(', ' ', '@@)', '\n'], tokens )
         self.assertEqual(2, self.tokenizer.lineNumber)
+
+    def test_should_split_across_blocks(self) -> None:
+        text = "@@@@ word @@{ @@[ @@< @@>\n@@] @@} @@i @@| @@m @@f @@u @@( @@)\nlast line@@"
+        expected = list(pyweb.Tokenizer(io.StringIO(text)))
+        for block_size in range(1, 8):
+            with self.subTest(block_size=block_size):
+                self.tokenizer = pyweb.Tokenizer(io.StringIO(text), block_size=block_size)
+                self.assertEqual(expected, list(self.tokenizer))
+                self.assertEqual(2, self.tokenizer.lineNumber)
+
+    def test_should_index_lines(self) -> None:
+        self.tokenizer = pyweb.Tokenizer(io.StringIO("one\n@@{two\n\nfour"), block_size=3, name="sample.w")
+        locations = [(token, self.tokenizer.index.line(self.tokenizer.offset)) for token in self.tokenizer]
+        self.assertEqual(
+            [('one', 1), ('\n', 2), ('@@{', 2), ('two', 2), ('\n', 3), ('\n', 4), ('four', 4)], 
+            locations)
+        self.assertEqual([0, 4, 10, 11], self.tokenizer.index.line_starts)
+        self.assertEqual(("sample.w", 3), self.tokenizer.index.location(10))
+
+    def test_mapped_should_match_text(self) -> None:
+        path = Path("TestTokenizer.w")
+        path.write_bytes("@@@@ w\u00f6rd @@{ @@\u00e9 @@\r\n@@} \u00fcber\rtwo @@@@\nlast line@@".encode("utf-8"))
+        try:
+            with path.open() as source:
+                expected = list(pyweb.Tokenizer(source))
+            with path.open("rb") as binary, mmap.mmap(binary.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                self.tokenizer = pyweb.MappedTokenizer(buffer)
+                self.assertEqual(expected, list(self.tokenizer))
+                self.assertEqual(3, self.tokenizer.lineNumber)
+        finally:
+            path.unlink()
 @}
 
 @d Unit Test of WebReader... @{
@@ -1201,6 +1613,26 @@ class TestOptionParser_NamedChunk(unittest.TestCase):
         text2 = " the name of test2 chunk... "
         options2 = self.option_parser.parse_args(shlex.split(text2))
         self.assertEqual(argparse.Namespace(argument=['the', 'name', 'of', 'test2', 'chunk...'], indent=False, noindent=False), options2)
+
+class TestChunkOptionParser(unittest.TestCase):
+    def test_should_match_argparse(self) -> None:
+        examples = [
+            (pyweb.WebReader.output_options, " -start /* -end */ something.css "),
+            (pyweb.WebReader.output_options, "something.py"),
+            (pyweb.WebReader.output_options, "-end */ -start /* \tsome\tthing.css"),
+            (pyweb.WebReader.output_options, "-st '/* ' -e ' */' 'some thing.css'"),
+            (pyweb.WebReader.output_options, ""),
+            (pyweb.WebReader.definition_options, "-noindent the name of test1 chunk..."),
+            (pyweb.WebReader.definition_options, "-indent -noindent  the name"),
+            (pyweb.WebReader.definition_options, "the name -indent"),
+            (pyweb.WebReader.definition_options, "-noi the name"),
+            (pyweb.WebReader.definition_options, "the  'quoted  name'"),
+        ]
+        for chunk_options, text in examples:
+            with self.subTest(text=text):
+                expected = chunk_options.parser.parse_args(shlex.split(text))
+                self.assertEqual(expected, chunk_options.parse(text))
+                self.assertIs(chunk_options.parse(text), chunk_options.parse(text))
 @}
 
 Testing the ``@@@@`` case and one of the ``@@(expr@@)`` cases.
@@ -1224,6 +1656,19 @@ class TestWebReader_Immediate(unittest.TestCase):
         self.assertEqual(1, len(chunks))
         self.assertEqual(1, len(chunks[0].commands))
         self.assertEqual("Filename: sample.w", chunks[0].commands[0].text)
+        
+    def test_expression_context(self) -> None:
+        pyweb.compile_expression.cache_clear()
+        text = "@@(theLocation@@)\n@@(len(theFile.name)@@)\n@@(theLocation@@)"
+        chunks = self.reader.load(Path("sample.w"), io.StringIO(text))
+        self.assertEqual(0, self.reader.errors)
+        self.assertEqual("('sample.w', 1)\n8\n('sample.w', 3)", chunks[0].commands[0].text)
+        self.assertEqual(1, pyweb.compile_expression.cache_info().hits)
+        
+    def test_spaced_expressions(self) -> None:
+        chunks = self.reader.load(Path("sample.w"), io.StringIO("@@( 2+3 @@) @@(\t40 + 2 @@)"))
+        self.assertEqual(0, self.reader.errors)
+        self.assertEqual("5 42", chunks[0].commands[0].text)
 @}
 
 Action Tests
@@ -1323,6 +1768,16 @@ class TestLoadAction(unittest.TestCase):
         self.assertEqual(self.webReader.load.mock_calls, [call(self.source_path)])
         self.webReader.web.assert_not_called()  # Deprecated
         self.webReader.source.assert_not_called()  # Deprecated
+        
+    def test_should_report_cycles(self) -> None:
+        self.webReader.load.return_value = [
+            pyweb.NamedChunk("a", commands=[pyweb.ReferenceCommand("b", ("sample.w", 1))]),
+            pyweb.NamedChunk("b", commands=[pyweb.ReferenceCommand("a", ("sample.w", 2))]),
+        ]
+        with self.assertLogs("LoadAction", level="WARNING") as log:
+            self.action(self.options)
+        self.assertEqual(["WARNING:LoadAction:Reference cycle among 'a' (1), 'b' (2)"], log.output)
+        self.assertEqual(2, len(self.options.web.chunks))
 @}
 
 Application Tests
@@ -1343,20 +1798,25 @@ The boilerplate code for unit testing is the following.
 @d Unit Test overheads...
 @{"""Unit tests."""
 import argparse
+import hashlib
 import io
+import json
 import logging
+import mmap
 import os
+import pickle
 from pathlib import Path
 import re
 import shlex
 import string
 import sys
+import tempfile
 import textwrap
 import time
 from types import SimpleNamespace
 from typing import Any, TextIO
 import unittest
-from unittest.mock import Mock, call, MagicMock, sentinel
+from unittest.mock import Mock, call, MagicMock, patch, sentinel
 import warnings
 
 import pyweb